@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Question-bank coverage matrix and gap report
+
+DomainData.getSubDomains declares the subdomains of all six domains, but
+QualityUnitQuestions.getQuestionsForSubDomain just filters the bank and returns
+an empty list for any subdomain without questions, so an assessor can open a
+subdomain that has nothing to answer. This script parses both Kotlin files into
+tables, builds the domain x subdomain question-count matrix and flags:
+
+    missing      declared subdomain with no questions
+    short        fewer than --min questions
+    over-full    more than --max questions
+    orphan       questions whose subdomain is not declared anywhere
+    duplicate    question ids used more than once (the app keys responses by id)
+
+Optionally it cross-references Firestore exports (reports, in-progress
+assessments, ...) and counts documents per domainId and subDomainId, so
+activity on a subdomain with a gap, or on an undeclared domain, shows up next
+to the matrix.
+
+Results go to stdout, and to --json / --html. --check exits non-zero if any
+gap is found, for running on every bank change.
+
+Usage:
+    python scripts/bank_coverage.py
+    python scripts/bank_coverage.py --json coverage.json --html coverage.html
+    python scripts/bank_coverage.py --export reports.jsonl --export in_progress.jsonl --check
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+import time
+from collections import Counter, namedtuple
+
+from firestore_io import iter_export
+from question_store import QuestionStore
+from stage_profiler import QUESTIONS_KT
+
+DOMAIN_DATA_KT = 'app/src/main/java/com/pramod/validator/data/DomainData.kt'
+
+KT_STRING = r'"((?:[^"\\]|\\.)*)"'
+DOMAIN_RE = re.compile(rf'\bDomain\({KT_STRING},\s*{KT_STRING},\s*{KT_STRING},\s*{KT_STRING},\s*(\d+)\)')
+SUB_DOMAIN_RE = re.compile(rf'\bSubDomain\({KT_STRING},\s*{KT_STRING},\s*{KT_STRING},\s*{KT_STRING},\s*(\d+)\)')
+
+Domain = namedtuple('Domain', ['id', 'name', 'description', 'icon', 'order'])
+SubDomain = namedtuple('SubDomain', ['id', 'domain_id', 'name', 'description', 'order'])
+
+CUSTOM_DOMAIN_ID = 'custom'  # ReportViewModel's domainId for custom assessments
+
+STATUS_OK = 'ok'
+STATUS_MISSING = 'missing'
+STATUS_SHORT = 'short'
+STATUS_OVER = 'over-full'
+
+
+def parse_domain_data(path=DOMAIN_DATA_KT):
+    """(domains, sub_domains) in declaration order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    domains = [Domain(*m.groups()[:4], int(m.group(5))) for m in DOMAIN_RE.finditer(content)]
+    sub_domains = [SubDomain(*m.groups()[:4], int(m.group(5))) for m in SUB_DOMAIN_RE.finditer(content)]
+    return domains, sub_domains
+
+
+def count_exports(paths):
+    """Documents per domainId and per subDomainId across the given exports"""
+    by_domain, by_sub_domain = Counter(), Counter()
+    for path in paths:
+        for doc in iter_export(path):
+            by_domain[doc.get('domainId', '')] += 1
+            by_sub_domain[doc.get('subDomainId', '')] += 1
+    return by_domain, by_sub_domain
+
+
+def build_coverage(domains, sub_domains, store, min_questions, max_questions, by_domain=None, by_sub_domain=None):
+    counts = store.counts_by_sub_domain()
+    id_counts = Counter(store.question_id(i) for i in range(len(store)))
+    by_domain = by_domain or Counter()
+    by_sub_domain = by_sub_domain or Counter()
+
+    declared = {s.id for s in sub_domains}
+    known_domains = {d.id for d in domains}
+    rows = []
+    for domain in domains:
+        entries = []
+        for sub in (s for s in sub_domains if s.domain_id == domain.id):
+            count = counts.get(sub.id, 0)
+            if count == 0:
+                status = STATUS_MISSING
+            elif count < min_questions:
+                status = STATUS_SHORT
+            elif count > max_questions:
+                status = STATUS_OVER
+            else:
+                status = STATUS_OK
+            entries.append({'id': sub.id, 'name': sub.name, 'order': sub.order, 'questions': count,
+                            'status': status, 'documents': by_sub_domain.get(sub.id, 0)})
+        rows.append({
+            'id': domain.id, 'name': domain.name,
+            'subDomains': entries,
+            'questions': sum(e['questions'] for e in entries),
+            'covered': sum(e['status'] != STATUS_MISSING for e in entries),
+            'documents': by_domain.get(domain.id, 0),
+        })
+
+    gaps = {status: [e['id'] for row in rows for e in row['subDomains'] if e['status'] == status]
+            for status in (STATUS_MISSING, STATUS_SHORT, STATUS_OVER)}
+    gaps['orphan'] = sorted(s for s in counts if s not in declared)
+    gaps['duplicateIds'] = sorted(q_id for q_id, n in id_counts.items() if n > 1)
+    return {
+        'thresholds': {'min': min_questions, 'max': max_questions},
+        'totals': {
+            'domains': len(domains), 'subDomains': len(sub_domains), 'questions': len(store),
+            'distinctQuestionIds': len(id_counts),
+            'coveredSubDomains': sum(row['covered'] for row in rows),
+        },
+        'domains': rows,
+        'gaps': gaps,
+        'documents': {
+            'byDomain': dict(by_domain),
+            'customAssessments': by_domain.get(CUSTOM_DOMAIN_ID, 0),
+            'undeclaredDomains': {d: n for d, n in by_domain.items()
+                                  if d not in known_domains and d != CUSTOM_DOMAIN_ID},
+            'onGapSubDomains': {s: by_sub_domain[s] for s in gaps[STATUS_MISSING] if by_sub_domain.get(s)},
+        },
+    }
+
+
+def has_gaps(coverage):
+    return any(coverage['gaps'].values())
+
+
+def print_summary(coverage):
+    totals = coverage['totals']
+    print(f"{totals['questions']} questions ({totals['distinctQuestionIds']} distinct ids), "
+          f"{totals['coveredSubDomains']}/{totals['subDomains']} subdomains covered")
+    print(f"{'domain':<24}{'covered':>10}{'questions':>11}{'documents':>11}")
+    for row in coverage['domains']:
+        print(f"{row['name']:<24}{row['covered']:>5}/{len(row['subDomains']):<4}{row['questions']:>11}"
+              f"{row['documents']:>11}")
+    for name, ids in coverage['gaps'].items():
+        if ids:
+            shown = ', '.join(ids[:8]) + (f', ... (+{len(ids) - 8})' if len(ids) > 8 else '')
+            print(f"{name}: {len(ids)} - {shown}")
+    if coverage['documents']['customAssessments']:
+        print(f"custom assessment documents: {coverage['documents']['customAssessments']}")
+    for sub_domain_id, n in coverage['documents']['onGapSubDomains'].items():
+        print(f"documents on missing subdomain {sub_domain_id}: {n}")
+    for domain_id, n in coverage['documents']['undeclaredDomains'].items():
+        print(f"documents with undeclared domainId {domain_id!r}: {n}")
+
+
+STATUS_COLOURS = {STATUS_OK: '#d9f2d9', STATUS_MISSING: '#f8d0d0', STATUS_SHORT: '#fbe8c0', STATUS_OVER: '#cfe0f7'}
+
+
+def render_html(coverage):
+    esc = html.escape
+    width = max((len(row['subDomains']) for row in coverage['domains']), default=0)
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Question bank coverage</title><style>',
+        'body{font-family:Helvetica,Arial,sans-serif;font-size:13px}table{border-collapse:collapse}',
+        'td,th{border:1px solid #ccc;padding:4px 6px;vertical-align:top}td.c{text-align:center;min-width:64px}',
+        'small{color:#555}',
+        '</style></head><body>',
+        '<h1>Question bank coverage</h1>',
+        f"<p>{coverage['totals']['questions']} questions, {coverage['totals']['coveredSubDomains']} of "
+        f"{coverage['totals']['subDomains']} subdomains covered. Thresholds: min "
+        f"{coverage['thresholds']['min']}, max {coverage['thresholds']['max']}.</p>",
+        '<table><tr><th>Domain</th><th>Questions</th><th>Documents</th>'
+        + ''.join(f'<th>{i + 1}</th>' for i in range(width)) + '</tr>',
+    ]
+    for row in coverage['domains']:
+        cells = ''.join(
+            f'<td class="c" style="background:{STATUS_COLOURS[e["status"]]}" title="{esc(e["name"])} ({e["status"]})">'
+            f'<b>{e["questions"]}</b><br><small>{esc(e["id"])}</small></td>'
+            for e in row['subDomains'])
+        cells += '<td></td>' * (width - len(row['subDomains']))
+        parts.append(f'<tr><th>{esc(row["name"])}</th><td class="c">{row["questions"]}</td>'
+                     f'<td class="c">{row["documents"]}</td>{cells}</tr>')
+    parts.append('</table><h2>Gaps</h2><ul>')
+    for name, ids in coverage['gaps'].items():
+        parts.append(f'<li><b>{esc(name)}</b> ({len(ids)}): {esc(", ".join(ids)) or "none"}</li>')
+    parts.append('</ul>')
+    undeclared = coverage['documents']['undeclaredDomains']
+    if undeclared:
+        parts.append('<h2>Documents with undeclared domainId</h2><ul>')
+        parts.extend(f'<li>{esc(d or "(empty)")}: {n}</li>' for d, n in sorted(undeclared.items()))
+        parts.append('</ul>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Question-bank coverage matrix and gap report')
+    parser.add_argument('--domains-kt', default=DOMAIN_DATA_KT, help='path to DomainData.kt')
+    parser.add_argument('--kt', default=QUESTIONS_KT, help='path to QualityUnitQuestions.kt')
+    parser.add_argument('--min', type=int, default=25, help='fewer questions than this is "short" (default 25)')
+    parser.add_argument('--max', type=int, default=30, help='more questions than this is "over-full" (default 30)')
+    parser.add_argument('--export', action='append', default=[], metavar='PATH',
+                        help='Firestore export (JSON or JSON lines) to count per domainId; repeatable')
+    parser.add_argument('--json', metavar='PATH', help='write the coverage report as JSON')
+    parser.add_argument('--html', metavar='PATH', help='write the coverage matrix as HTML')
+    parser.add_argument('--check', action='store_true', help='exit 1 if any gap is found')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    domains, sub_domains = parse_domain_data(args.domains_kt)
+    store = QuestionStore.from_kotlin(args.kt)
+    by_domain, by_sub_domain = count_exports(args.export)
+    coverage = build_coverage(domains, sub_domains, store, args.min, args.max, by_domain, by_sub_domain)
+    elapsed = time.perf_counter() - start
+
+    print_summary(coverage)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(coverage, f, indent=2, ensure_ascii=False)
+    if args.html:
+        with open(args.html, 'w', encoding='utf-8') as f:
+            f.write(render_html(coverage))
+    print(f"Done in {elapsed * 1000:.0f} ms")
+    if args.check and has_gaps(coverage):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
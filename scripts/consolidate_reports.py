@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+One-pass duplicate-report detection and consolidation
+
+ReportViewModel calls FirebaseRepository.findExistingReport before saving so a
+re-run assessment updates its report instead of adding another one, but older
+data (and saves that raced each other) left duplicates behind. This script
+groups reports by the same natural key that query filters on:
+
+    userId, assessmentName, subDomainId,
+    facilityId (unless domainId is "custom" or facilityId is empty),
+    domainId
+
+and keeps the newest report of each group by completedAt, as the query's
+orderBy(completedAt, DESCENDING).limit(1) does. Every other report in the group
+is deleted. If the kept report has no completed AI summary but a superseded
+duplicate with identical responses does, the plan merges that summary into the
+kept report.
+
+The export is streamed once and only a fixed-size record per distinct key is
+held in memory (16-byte key hash, keeper id and completedAt, responses hash and
+the best summary donor's id). Deletes are streamed to the plan as soon as a
+report is known to be superseded; merges are written at the end.
+
+--apply runs a plan through batched writes: merges first (reading each donor's
+summary, so nothing is deleted before it has been copied), then deletes,
+checkpointed to <plan>.checkpoint.json so an interrupted run can be resumed.
+--apply cannot be combined with --dry-run: an empty fake has no donors to read.
+
+Usage:
+    python scripts/consolidate_reports.py reports.jsonl -o plan.jsonl
+    python scripts/consolidate_reports.py --from-firestore -o plan.jsonl --key key.json
+    python scripts/consolidate_reports.py --apply plan.jsonl --key key.json
+    python scripts/consolidate_reports.py --bench 1000000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from firestore_io import (REPORTS, BatchWriter, Checkpoint, MemorySink, add_firestore_args, iter_export, open_sink,
+                          source_fingerprint)
+
+KEY_SEPARATOR = '\x1f'
+
+
+def natural_key(report):
+    """Field values findExistingReport filters on when saving this report"""
+    domain_id = report.get('domainId', '')
+    facility_id = report.get('facilityId', '')
+    return (
+        report.get('userId', ''),
+        report.get('assessmentName', ''),
+        report.get('subDomainId', ''),
+        facility_id if domain_id != 'custom' else '',
+        domain_id,
+    )
+
+
+def key_hash(key):
+    return hashlib.blake2b(KEY_SEPARATOR.join(key).encode('utf-8'), digest_size=16).digest()
+
+
+def responses_hash(report):
+    responses = json.dumps(report.get('responses') or {}, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(responses.encode('utf-8'), digest_size=8).digest()
+
+
+def has_summary(report):
+    # Report.aiSummaryStatus defaults to "completed", so reports written before the field existed count as summarised
+    return report.get('aiSummaryStatus', 'completed') == 'completed' and bool(report.get('aiSummary'))
+
+
+class Group:
+    """Current keeper of one natural key, and the newest summary donor for it"""
+
+    __slots__ = ('keep', 'responses', 'summarised', 'size', 'donor')
+
+    def __init__(self, rank, responses, summarised):
+        self.keep = rank  # (completedAt, id): tuples order like the query, ties go to the larger id
+        self.responses = responses
+        self.summarised = summarised
+        self.size = 1
+        self.donor = None
+
+    def offer_donor(self, rank, responses, summarised):
+        if summarised and responses == self.responses and (self.donor is None or rank > self.donor):
+            self.donor = rank
+
+    def replace_keeper(self, rank, responses, summarised):
+        """Make rank the keeper; returns the superseded keeper's rank"""
+        old_rank, old_responses, old_summarised = self.keep, self.responses, self.summarised
+        self.keep, self.responses, self.summarised = rank, responses, summarised
+        if self.donor is not None and old_responses != responses:
+            self.donor = None  # donors must answer exactly like the keeper
+        self.offer_donor(old_rank, old_responses, old_summarised)
+        return old_rank
+
+
+def plan_consolidation(reports, emit):
+    """Stream reports once, calling emit(op) for each plan operation; returns stats"""
+    groups = {}
+    stats = {'reports': 0, 'keys': 0, 'duplicate_keys': 0, 'deletes': 0, 'merges': 0, 'skipped': 0}
+    for report in reports:
+        stats['reports'] += 1
+        report_id = report.get('id')
+        if not report_id:
+            stats['skipped'] += 1
+            continue
+        rank = (report.get('completedAt') or 0, report_id)
+        responses = responses_hash(report)
+        summarised = has_summary(report)
+        digest = key_hash(natural_key(report))
+
+        group = groups.get(digest)
+        if group is None:
+            groups[digest] = Group(rank, responses, summarised)
+            continue
+        if report_id == group.keep[1]:
+            continue  # same document listed twice in the export
+        group.size += 1
+        if rank > group.keep:
+            loser = group.replace_keeper(rank, responses, summarised)
+        else:
+            loser = rank
+            group.offer_donor(rank, responses, summarised)
+        emit({'op': 'delete', 'id': loser[1], 'completedAt': loser[0], 'key': digest.hex()})
+        stats['deletes'] += 1
+
+    for digest, group in groups.items():
+        stats['keys'] += 1
+        if group.size > 1:
+            stats['duplicate_keys'] += 1
+        if not group.summarised and group.donor is not None:
+            emit({'op': 'merge', 'id': group.keep[1], 'from': group.donor[1], 'key': digest.hex()})
+            stats['merges'] += 1
+    return stats
+
+
+def write_plan(reports, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        return plan_consolidation(reports, lambda op: f.write(json.dumps(op) + '\n'))
+
+
+def iter_plan(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+
+def apply_plan(path, sink, concurrency=4, checkpoint_path=None):
+    """Merges first, then deletes; a resumed run skips deletes already committed"""
+    # Deletes against MemorySink (the --bench check) commit nothing real, so they must not advance the checkpoint
+    checkpoint = None
+    resume_after = 0
+    if not isinstance(sink, MemorySink):
+        checkpoint = Checkpoint(checkpoint_path or path + '.checkpoint.json', source_fingerprint(path))
+        resume_after = checkpoint.row
+    stats = {'merged': 0, 'merge_skipped': 0, 'deleted': 0, 'delete_skipped': 0}
+
+    with BatchWriter(sink, max_in_flight=concurrency) as writer:
+        for _, op in iter_plan(path):
+            if op['op'] != 'merge':
+                continue
+            donor = sink.get(REPORTS, op['from'])
+            if donor is None or not has_summary(donor):
+                stats['merge_skipped'] += 1  # donor already deleted by an earlier run, or changed since planning
+                continue
+            writer.update(REPORTS, op['id'], {'aiSummary': donor['aiSummary'], 'aiSummaryStatus': 'completed'})
+            stats['merged'] += 1
+
+    with BatchWriter(sink, max_in_flight=concurrency, on_checkpoint=checkpoint and checkpoint.save) as writer:
+        for line_number, op in iter_plan(path):
+            if op['op'] != 'delete':
+                continue
+            if line_number <= resume_after:
+                stats['delete_skipped'] += 1
+                continue
+            writer.delete(REPORTS, op['id'], tag=line_number)
+            stats['deleted'] += 1
+    stats['batches'] = writer.batches_committed
+    return stats
+
+
+def firestore_reports(args):
+    for doc_id, data in open_sink(args).stream(REPORTS):
+        yield dict(data, id=data.get('id') or doc_id)
+
+
+def synthetic_reports(n, duplicate_every=4):
+    """n reports; every duplicate_every-th re-saves the previous assessment, some without an AI summary"""
+    for i in range(n):
+        base = i - 1 if i % duplicate_every == duplicate_every - 1 else i
+        yield {
+            'id': f'report{i:07d}',
+            'userId': f'user{base % 5000}',
+            'assessmentName': f'Assessment {base}',
+            'facilityId': f'facility{base % 40}',
+            'domainId': 'quality_unit',
+            'subDomainId': 'qu_deviations',
+            'completedAt': 1_700_000_000_000 + i,
+            'responses': {'qu_deviations_1': 'COMPLIANT', 'qu_deviations_2': 'NON_COMPLIANT'},
+            'aiSummary': '' if i % 8 == 7 else '{"strengths": []}',
+            'aiSummaryStatus': 'pending' if i % 8 == 7 else 'completed',
+        }
+
+
+def bench(n):
+    counts = {'delete': 0, 'merge': 0}
+    start = time.perf_counter()
+    stats = plan_consolidation(synthetic_reports(n), lambda op: counts.__setitem__(op['op'], counts[op['op']] + 1))
+    elapsed = time.perf_counter() - start
+    print(f"Planned {stats['reports']:,} reports in {elapsed:.2f}s ({stats['reports'] / elapsed:,.0f}/s): "
+          f"{stats['keys']:,} keys, {counts['delete']:,} deletes, {counts['merge']:,} merges")
+
+    # tracemalloc slows allocation-heavy loops several times over, so measure memory on a sample
+    sample = min(n, 100_000)
+    tracemalloc.start()
+    sample_stats = plan_consolidation(synthetic_reports(sample), lambda op: None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Peak memory {peak / sample_stats['keys']:.0f} bytes per distinct key ({sample:,}-report sample)")
+
+    # Apply a smaller plan to the in-memory fake and check one newest report survives per key
+    reports = list(synthetic_reports(min(n, 20_000)))
+    sink = MemorySink()
+    sink.collections[REPORTS] = {report['id']: report for report in reports}
+    with tempfile.TemporaryDirectory() as tmp:
+        plan = os.path.join(tmp, 'plan.jsonl')
+        write_plan(reports, plan)
+        applied = apply_plan(plan, sink)
+    newest = {}
+    for report in reports:
+        key = natural_key(report)
+        newest[key] = max(newest.get(key, (0, '')), (report['completedAt'], report['id']))
+    kept = sink.collections[REPORTS]
+    assert sorted(kept) == sorted(report_id for _, report_id in newest.values()), 'wrong reports kept'
+    assert all(has_summary(report) for report in kept.values()), 'summary not merged'
+    print(f"Applied to {len(reports):,} reports: {len(kept):,} kept, {applied['merged']} summaries merged, "
+          f"{applied['batches']} delete batches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detect and consolidate duplicate reports')
+    parser.add_argument('input', nargs='?', help='reports export (JSON array or JSON lines)')
+    parser.add_argument('--from-firestore', action='store_true', help='stream the reports collection instead')
+    parser.add_argument('-o', '--output', default='consolidation_plan.jsonl', help='plan file to write')
+    parser.add_argument('--apply', metavar='PLAN', help='apply a plan written by an earlier run')
+    parser.add_argument('--concurrency', type=int, default=4, help='batches committed in parallel (default 4)')
+    parser.add_argument('--bench', type=int, metavar='N', help='plan N synthetic reports and report throughput')
+    add_firestore_args(parser)
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+
+    start = time.perf_counter()
+    if args.apply:
+        if args.dry_run:
+            parser.error('--apply needs the real reports to read merge donors from; it cannot run with --dry-run')
+        stats = apply_plan(args.apply, open_sink(args), concurrency=args.concurrency)
+        print(f"Merged {stats['merged']} AI summaries, deleted {stats['deleted']} reports "
+              f"in {stats['batches']} batches, {time.perf_counter() - start:.1f}s")
+        if stats['delete_skipped']:
+            print(f"Skipped {stats['delete_skipped']} deletes already committed (checkpoint)")
+        if stats['merge_skipped']:
+            print(f"Skipped {stats['merge_skipped']} merges whose donor no longer has a summary", file=sys.stderr)
+        return
+
+    if args.from_firestore:
+        reports = firestore_reports(args)
+    elif args.input:
+        reports = iter_export(args.input)
+    else:
+        parser.error('give a reports export, --from-firestore, --apply PLAN or --bench N')
+    stats = write_plan(reports, args.output)
+    print(f"Scanned {stats['reports']:,} reports: {stats['keys']:,} distinct keys, "
+          f"{stats['duplicate_keys']:,} with duplicates ({time.perf_counter() - start:.1f}s)")
+    print(f"Plan: {stats['deletes']:,} deletes, {stats['merges']:,} summary merges -> {args.output}")
+    if stats['skipped']:
+        print(f"Skipped {stats['skipped']} reports without an id", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
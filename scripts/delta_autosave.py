@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Delta autosave format for in-progress assessments, with a write simulator
+
+Today every answer and every next/previous step calls
+InProgressAssessmentRepository.updateInProgressAssessment, which .set()s the
+whole document - header, the full responses map and the full questionTexts
+map - so a 25-question assessment rewrites the same document ~50 times.
+
+The delta format writes the full document once, then only what changed:
+
+    base snapshot (set once, on the first save):
+        the usual header fields, questionTexts, createdAt
+        v  = 2                      format version
+        q  = [questionId, ...]      question order, fixed for the session
+        a  = "CN-A-..."             one code per question in q order (- = unanswered)
+        p  = {}                     answers not yet folded into a
+    answer autosave (update()):     {"p.<questionId>": "C", currentQuestionIndex, updatedAt}
+    navigation autosave (update()): {currentQuestionIndex, updatedAt}
+    compaction, every --compact-every answers, instead of that answer's patch:
+                                    {"a": <a with p and the new answer folded in>, "p": {}, ...}
+
+The positional string is the most compact form but cannot be patched per
+question; the p map can. Compaction keeps p short without adding writes.
+decode() turns either format back into the responses map the app uses.
+
+The simulator replays sessions against two MemorySinks, one per format, checks
+that both decode to the same responses, and compares writes and bytes per
+completed assessment. Sessions come from a JSON-lines recording or are
+synthesised from the question bank.
+
+Recorded session format (one per line):
+    {"assessment": {<InProgressAssessment fields>, "questionTexts": {...}},
+     "questionIds": [...],                              optional, defaults to questionTexts order
+     "events": [{"type": "answer", "questionId": "qu_capa_1", "answer": "COMPLIANT"},
+                {"type": "navigate", "index": 1}, ...]}
+
+Usage:
+    python scripts/delta_autosave.py --sessions 2000
+    python scripts/delta_autosave.py sessions.jsonl --compact-every 8
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from firestore_io import IN_PROGRESS_ASSESSMENTS, MemorySink, doc_size, field_path, iter_export
+from question_store import QuestionStore
+from stage_profiler import QUESTIONS_KT
+
+FORMAT_VERSION = 2
+UNANSWERED = '-'
+ANSWER_CODES = {'COMPLIANT': 'C', 'NON_COMPLIANT': 'N', 'NOT_APPLICABLE': 'A'}
+ANSWER_NAMES = {code: name for name, code in ANSWER_CODES.items()}
+
+HEADER_FIELDS = ('userId', 'assessmentName', 'facilityId', 'facilityName', 'domainId', 'domainName',
+                 'subDomainId', 'subDomainName', 'isCustomAssessment', 'totalQuestions')
+
+
+def full_document(header, question_texts, responses, index, created_at, updated_at):
+    """The map updateInProgressAssessment .set()s today"""
+    data = {field: header[field] for field in HEADER_FIELDS}
+    data.update(currentQuestionIndex=index, responses=dict(responses), questionTexts=question_texts,
+                createdAt=created_at, updatedAt=updated_at)
+    return data
+
+
+class DeltaSession:
+    """Client-side state of one assessment using the delta format"""
+
+    def __init__(self, header, question_ids, question_texts, compact_every=10):
+        self.header = header
+        self.question_ids = question_ids
+        self.position = {q_id: i for i, q_id in enumerate(question_ids)}
+        self.question_texts = question_texts
+        self.compact_every = compact_every
+        self.folded = [UNANSWERED] * len(question_ids)
+        self.pending = {}
+        self.started = False
+
+    def base_snapshot(self, index, now_ms):
+        data = {field: self.header[field] for field in HEADER_FIELDS}
+        data.update(v=FORMAT_VERSION, q=self.question_ids, a=''.join(self.folded), p={},
+                    questionTexts=self.question_texts, currentQuestionIndex=index,
+                    createdAt=now_ms, updatedAt=now_ms)
+        return data
+
+    def answer(self, question_id, answer, index, now_ms):
+        """Operation for one answer autosave"""
+        code = ANSWER_CODES[answer]
+        if not self.started:
+            self.started = True
+            self._fold(question_id, code)
+            return 'set', self.base_snapshot(index, now_ms)
+        self.pending[question_id] = code
+        if question_id not in self.position or len(self.pending) < self.compact_every:
+            # Ids outside q (custom questions added mid-session) stay in p; compaction keeps them there
+            return 'patch', {field_path('p', question_id): code, 'currentQuestionIndex': index, 'updatedAt': now_ms}
+        return 'patch', self.compact(index, now_ms)
+
+    def navigate(self, index, now_ms):
+        if not self.started:
+            self.started = True
+            return 'set', self.base_snapshot(index, now_ms)
+        return 'patch', {'currentQuestionIndex': index, 'updatedAt': now_ms}
+
+    def compact(self, index, now_ms):
+        for question_id, code in list(self.pending.items()):
+            if question_id in self.position:
+                self._fold(question_id, code)
+                del self.pending[question_id]
+        return {'a': ''.join(self.folded), 'p': dict(self.pending), 'currentQuestionIndex': index, 'updatedAt': now_ms}
+
+    def _fold(self, question_id, code):
+        position = self.position.get(question_id)
+        if position is None:
+            self.pending[question_id] = code
+        else:
+            self.folded[position] = code
+
+
+def decode(document):
+    """responses map (questionId -> AnswerType name) from either document format"""
+    if document.get('v') != FORMAT_VERSION:
+        return dict(document.get('responses') or {})
+    responses = {q_id: ANSWER_NAMES[code] for q_id, code in zip(document['q'], document['a']) if code != UNANSWERED}
+    responses.update((q_id, ANSWER_NAMES[code]) for q_id, code in document['p'].items())
+    return responses
+
+
+def replay(session, doc_id, full_sink, delta_sink, compact_every):
+    """Apply one session's autosaves in both formats; returns (responses, question count)"""
+    assessment = session['assessment']
+    question_texts = assessment.get('questionTexts') or {}
+    question_ids = list(dict.fromkeys(session.get('questionIds') or question_texts))  # the bank repeats some ids
+    header = {field: '' for field in HEADER_FIELDS}
+    header.update(isCustomAssessment=False, totalQuestions=len(question_ids))
+    header.update((k, v) for k, v in assessment.items() if k in HEADER_FIELDS)
+    delta = DeltaSession(header, question_ids, question_texts, compact_every)
+    responses = {}
+    index = 0
+    created_at = now_ms = assessment.get('createdAt') or 1_700_000_000_000
+    for event in session['events']:
+        now_ms = event.get('t', now_ms + 1000)
+        if event['type'] == 'answer':
+            responses[event['questionId']] = event['answer']
+            op, data = delta.answer(event['questionId'], event['answer'], index, now_ms)
+        else:
+            index = event['index']
+            op, data = delta.navigate(index, now_ms)
+        full_sink.commit([('set', IN_PROGRESS_ASSESSMENTS, doc_id,
+                           full_document(header, question_texts, responses, index, created_at, now_ms))])
+        delta_sink.commit([(op, IN_PROGRESS_ASSESSMENTS, doc_id, data)])
+    return responses, len(question_ids)
+
+
+def synthetic_sessions(n, kt_path=QUESTIONS_KT, seed=0, revisit_rate=0.1, change_rate=0.05):
+    """Assessors answering a whole subdomain in order, sometimes stepping back to change an answer"""
+    store = QuestionStore.from_kotlin(kt_path)
+    by_sub_domain = [(sub_domain, store.indices_for_sub_domain(sub_domain)) for sub_domain in store.sub_domains]
+    answers = ['COMPLIANT'] * 6 + ['NON_COMPLIANT'] * 3 + ['NOT_APPLICABLE']
+    rng = random.Random(seed)
+    for s in range(n):
+        sub_domain, indices = by_sub_domain[s % len(by_sub_domain)]
+        question_ids = [store.question_id(i) for i in indices]
+        events = []
+        for position, question_id in enumerate(question_ids):
+            events.append({'type': 'answer', 'questionId': question_id, 'answer': rng.choice(answers)})
+            if position and rng.random() < revisit_rate:
+                events.append({'type': 'navigate', 'index': position - 1})
+                if rng.random() < change_rate / revisit_rate:
+                    events.append({'type': 'answer', 'questionId': question_ids[position - 1],
+                                   'answer': rng.choice(answers)})
+                events.append({'type': 'navigate', 'index': position})
+            if position < len(question_ids) - 1:
+                events.append({'type': 'navigate', 'index': position + 1})
+        yield {
+            'assessment': {
+                'userId': f'user{s % 500}', 'assessmentName': f'{sub_domain} audit {s}',
+                'facilityId': f'facility{s % 40}', 'facilityName': f'Facility {s % 40}',
+                'domainId': sub_domain.split('_')[0], 'domainName': 'Quality Unit',
+                'subDomainId': sub_domain, 'subDomainName': sub_domain.replace('_', ' ').title(),
+                'questionTexts': {store.question_id(i): store.text(i) for i in indices},
+            },
+            'questionIds': question_ids,
+            'events': events,
+        }
+
+
+def simulate(sessions, compact_every=10):
+    per_session = []
+    completed = 0
+    for n, session in enumerate(sessions):
+        full_sink, delta_sink = MemorySink(), MemorySink()
+        doc_id = f'session{n}'
+        responses, question_count = replay(session, doc_id, full_sink, delta_sink, compact_every)
+        full_doc = full_sink.collections[IN_PROGRESS_ASSESSMENTS][doc_id]
+        delta_doc = delta_sink.collections[IN_PROGRESS_ASSESSMENTS][doc_id]
+        assert decode(full_doc) == decode(delta_doc) == responses, f'{doc_id}: formats disagree'
+        completed += len(responses) >= question_count
+        per_session.append((full_sink.writes, full_sink.bytes_written, doc_size(full_doc),
+                            delta_sink.writes, delta_sink.bytes_written, doc_size(delta_doc)))
+    return per_session, completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate full vs delta autosave of in-progress assessments')
+    parser.add_argument('input', nargs='?', help='recorded sessions (JSON lines or JSON array)')
+    parser.add_argument('--sessions', type=int, default=1000, help='synthetic sessions when no input is given')
+    parser.add_argument('--compact-every', type=int, default=10, help='fold pending answers after this many')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kt', default=QUESTIONS_KT, help='path to QualityUnitQuestions.kt')
+    args = parser.parse_args()
+    if args.compact_every < 1:
+        parser.error('--compact-every must be at least 1')
+
+    sessions = iter_export(args.input) if args.input else synthetic_sessions(args.sessions, args.kt, args.seed)
+    start = time.perf_counter()
+    per_session, completed = simulate(sessions, args.compact_every)
+    elapsed = time.perf_counter() - start
+    if not per_session:
+        raise SystemExit('no sessions to simulate')
+
+    columns = list(zip(*per_session))
+    full_writes, full_bytes, full_doc, delta_writes, delta_bytes, delta_doc = (statistics.mean(c) for c in columns)
+    print(f"{len(per_session):,} sessions ({completed:,} completed) replayed in {elapsed:.1f}s, "
+          f"compaction every {args.compact_every} answers")
+    print(f"{'per assessment':<22}{'full .set':>14}{'delta':>14}{'ratio':>9}")
+    for label, full, delta in (('writes', full_writes, delta_writes),
+                               ('bytes written', full_bytes, delta_bytes),
+                               ('final document bytes', full_doc, delta_doc)):
+        print(f"{label:<22}{full:>14,.0f}{delta:>14,.0f}{delta / full:>8.1%}")
+    p95 = statistics.quantiles([row[4] / row[1] for row in per_session], n=20)[-1] if len(per_session) > 1 else None
+    if p95 is not None:
+        print(f"p95 delta/full bytes ratio: {p95:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Pooled bulk dispatcher for invitation and credential emails
+
+Renders the templates defined in services/EmailService.kt (createInvitationEmailHtml,
+createCredentialsEmailText) for a batch of Invitation records and sends them over
+a pool of persistent SMTP connections.
+
+- Templates are read from EmailService.kt once and compiled into literal/placeholder
+  parts, so rendering a message is a single join.
+- Every message is rendered into a durable SQLite outbox before anything is sent.
+  Re-running with the same --outbox resumes: sent messages are skipped, temporary
+  failures are retried with backoff, permanent (5xx) failures are not.
+  Rendered bodies - which for --kind credentials include tempPassword - are
+  kept only while a message is pending: the body is erased as soon as it is
+  sent or permanently failed, leaving id, recipient, status and error. Delete
+  the outbox file once a run has finished if even pending bodies must not stay
+  on disk. The Date header is added at send time.
+- Names that end up in headers have CR/LF and other control characters folded
+  to spaces. Records whose email is not a plain ASCII address, or that miss
+  token / tempPassword, are stored as failed in the outbox and never sent.
+- Each worker keeps its SMTP connection open across messages and pipelines
+  MAIL/RCPT/DATA when the server advertises PIPELINING.
+- Sends are rate limited per recipient domain (token bucket).
+
+Input is a JSON array or JSON-lines file of Invitation documents (email,
+displayName, enterpriseId, token, ...) or --from-firestore for unused invitations.
+For credentials, each record also needs tempPassword.
+
+Local testing against aiosmtpd:
+    python -m aiosmtpd -n -l localhost:8025
+    python scripts/dispatch_emails.py invitations.json --smtp localhost:8025
+    python scripts/dispatch_emails.py --bench 500 --smtp localhost:8025
+"""
+
+import argparse
+import base64
+import html
+import json
+import os
+import re
+import smtplib
+import sqlite3
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid
+
+from firestore_io import INVITATIONS, PROJECT_ID
+
+EMAIL_SERVICE_KT = 'app/src/main/java/com/pramod/validator/services/EmailService.kt'
+
+# Same scheme as InvitationRepository.getInvitationLink
+INVITATION_LINK = 'validator://invite?token={token}'
+
+# kind -> (EmailService.kt function, subject template, is_html)
+TEMPLATES = {
+    'invitation': ('createInvitationEmailHtml', 'Invitation to Join $enterpriseName', True),
+    'credentials': ('createCredentialsEmailText', 'Login Credentials', False),
+}
+
+TEMPLATE_FUN_RE = re.compile(r'private fun (\w+)\([^)]*\): String \{\s*return """(.*?)"""\.trimIndent\(\)', re.S)
+PLACEHOLDER_RE = re.compile(r'\$\{(\w+)\}|\$([A-Za-z_]\w*)')
+DOT_STUFF_RE = re.compile(br'(?m)^\.')
+# Plain ASCII addr-spec without whitespace, controls or characters that would break <...> in headers and RCPT TO
+ADDRESS_RE = re.compile(r'[!#-\'*+\-/-9=?A-Z^-~.]+@[A-Za-z0-9.\-\[\]:]+')
+HEADER_CONTROL_RE = re.compile(r'[\x00-\x1f\x7f]+')
+
+
+class InvalidRecord(ValueError):
+    """A record that cannot be rendered safely; it is recorded as failed instead of sent"""
+
+
+class CompiledTemplate:
+    """Kotlin string template split once into literals and placeholder names"""
+
+    def __init__(self, source, escape=False):
+        self.literals = []
+        self.names = []
+        self.escape = escape
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            self.literals.append(source[pos:match.start()])
+            self.names.append(match.group(1) or match.group(2))
+            pos = match.end()
+        self.literals.append(source[pos:])
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            value = str(values[name])
+            parts.append(html.escape(value) if self.escape else value)
+            parts.append(literal)
+        return ''.join(parts)
+
+
+def trim_indent(text):
+    """Kotlin String.trimIndent(): drop blank first/last lines, remove common indent"""
+    lines = text.split('\n')
+    if lines and not lines[0].strip():
+        lines = lines[1:]
+    if lines and not lines[-1].strip():
+        lines = lines[:-1]
+    return textwrap.dedent('\n'.join(lines))
+
+
+_template_cache = {}
+
+
+def load_templates(path=EMAIL_SERVICE_KT):
+    """{kind: (subject, body, is_html)} compiled from EmailService.kt, cached per file mtime"""
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    if key not in _template_cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            sources = {name: trim_indent(body) for name, body in TEMPLATE_FUN_RE.findall(f.read())}
+        compiled = {}
+        for kind, (fun, subject, is_html) in TEMPLATES.items():
+            if fun not in sources:
+                raise SystemExit(f'{path}: template function {fun} not found')
+            compiled[kind] = (CompiledTemplate(subject), CompiledTemplate(sources[fun], escape=is_html), is_html)
+        _template_cache[key] = compiled
+    return _template_cache[key]
+
+
+def check_address(address):
+    """address, if it can go into a To header and RCPT TO as-is; raises InvalidRecord otherwise"""
+    if not isinstance(address, str) or not ADDRESS_RE.fullmatch(address):
+        raise InvalidRecord(f'invalid email address {address!r}')
+    return address
+
+
+def single_line(value):
+    """Admin-entered text with CR/LF and other controls folded to spaces, so it cannot add header lines"""
+    return HEADER_CONTROL_RE.sub(' ', str(value)).strip()
+
+
+def template_values(kind, record, enterprise_name, invited_by):
+    email = check_address(record.get('email'))
+    values = {
+        'recipientName': single_line(record.get('displayName') or email),
+        'enterpriseName': single_line(record.get('enterpriseName') or enterprise_name),
+        'invitedBy': single_line(record.get('invitedByName') or invited_by),
+        'email': email,
+    }
+    field = 'token' if kind == 'invitation' else 'tempPassword'
+    if not record.get(field):
+        raise InvalidRecord(f'{field} is missing')
+    if kind == 'invitation':
+        values['invitationLink'] = INVITATION_LINK.format(token=record['token'])
+    else:
+        values['tempPassword'] = record['tempPassword']
+    return values
+
+
+def encode_header(value):
+    value = single_line(value)
+    return value if value.isascii() else Header(value, 'utf-8').encode()
+
+
+def build_message(kind, record, sender, templates, enterprise_name, invited_by):
+    """Raw MIME bytes for one message.
+
+    The message shape is fixed (single part, UTF-8, base64), so headers are
+    written directly; going through EmailMessage's header registry costs ~3 ms
+    per message, more than rendering the template.
+    """
+    subject, body, is_html = templates[kind]
+    values = template_values(kind, record, enterprise_name, invited_by)
+    headers = (
+        f"From: {sender}\r\n"
+        f"To: {formataddr((values['recipientName'], values['email']), charset='utf-8')}\r\n"
+        f"Subject: {encode_header(subject.render(values))}\r\n"
+        f"Message-ID: {make_msgid(domain=sender.rpartition('@')[2].strip('>') or None)}\r\n"
+        f"MIME-Version: 1.0\r\n"
+        f"Content-Type: text/{'html' if is_html else 'plain'}; charset=\"utf-8\"\r\n"
+        f"Content-Transfer-Encoding: base64\r\n\r\n"
+    )
+    encoded = base64.encodebytes(body.render(values).encode('utf-8')).replace(b'\n', b'\r\n')
+    return headers.encode('ascii') + encoded
+
+
+class Outbox:
+    """SQLite-backed outbox; only the dispatching thread touches the connection"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA secure_delete=ON')  # purged message bodies are overwritten, not left in free pages
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            ' id TEXT PRIMARY KEY, recipient TEXT NOT NULL, domain TEXT NOT NULL,'
+            ' message BLOB NOT NULL, status TEXT NOT NULL DEFAULT \'pending\','
+            ' attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0,'
+            ' last_error TEXT, sent_at REAL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)')
+        # Outboxes written before bodies were purged on completion
+        self.db.execute("UPDATE outbox SET message = X'' WHERE status != 'pending' AND length(message) > 0")
+        self.db.commit()
+
+    def enqueue(self, rows):
+        """rows: (id, recipient, message bytes); existing ids are left untouched"""
+        cursor = self.db.executemany(
+            'INSERT OR IGNORE INTO outbox (id, recipient, domain, message) VALUES (?, ?, ?, ?)',
+            ((msg_id, rcpt, rcpt.rpartition('@')[2].lower(), message) for msg_id, rcpt, message in rows),
+        )
+        self.db.commit()
+        return cursor.rowcount
+
+    def reject(self, rows):
+        """rows: (id, recipient, error) for records that could not be rendered; stored as failed, never sent"""
+        cursor = self.db.executemany(
+            "INSERT OR IGNORE INTO outbox (id, recipient, domain, message, status, last_error)"
+            " VALUES (?, ?, ?, X'', 'failed', ?)",
+            ((msg_id, rcpt, rcpt.rpartition('@')[2].lower(), error) for msg_id, rcpt, error in rows),
+        )
+        self.db.commit()
+        return cursor.rowcount
+
+    def due(self, limit):
+        return self.db.execute(
+            "SELECT id, recipient, domain, message, attempts FROM outbox"
+            " WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+            (time.time(), limit),
+        ).fetchall()
+
+    def next_retry_in(self):
+        row = self.db.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def record(self, results, max_attempts):
+        now = time.time()
+        for msg_id, attempts, error, permanent in results:
+            if error is None:
+                self.db.execute("UPDATE outbox SET status = 'sent', attempts = ?, sent_at = ?, last_error = NULL,"
+                                " message = X'' WHERE id = ?", (attempts, now, msg_id))
+            elif permanent or attempts >= max_attempts:
+                self.db.execute("UPDATE outbox SET status = 'failed', attempts = ?, last_error = ?, message = X''"
+                                " WHERE id = ?", (attempts, error, msg_id))
+            else:
+                backoff = min(300, 2 ** attempts)
+                self.db.execute('UPDATE outbox SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?',
+                                (attempts, error, now + backoff, msg_id))
+        self.db.commit()
+
+    def counts(self):
+        return dict(self.db.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain; rate in messages/second, 0 = unlimited"""
+
+    def __init__(self, default_rate, overrides=None):
+        self.default_rate = default_rate
+        self.overrides = overrides or {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, domain):
+        rate = self.overrides.get(domain, self.default_rate)
+        if rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens, last = self.buckets.get(domain, (rate, now))
+                tokens = min(rate, tokens + (now - last) * rate)
+                if tokens >= 1:
+                    self.buckets[domain] = (tokens - 1, now)
+                    return
+                self.buckets[domain] = (tokens, now)
+                wait = (1 - tokens) / rate
+            time.sleep(wait)
+
+
+class SmtpPool:
+    """One persistent SMTP connection per worker thread"""
+
+    def __init__(self, host, port, sender, starttls=False, user=None, password=None, recycle_after=1000):
+        self.host = host
+        self.port = port
+        self.envelope_from = self.envelope_address(sender)
+        self.starttls = starttls
+        self.user = user
+        self.password = password
+        self.recycle_after = recycle_after
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def envelope_address(sender):
+        return sender.rpartition('<')[2].rstrip('>') if '<' in sender else sender
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        smtp.ehlo()
+        if self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.user:
+            smtp.login(self.user, self.password or '')
+        with self.lock:
+            self.connections.append(smtp)
+        self.local.smtp = smtp
+        self.local.sent = 0
+        return smtp
+
+    def _connection(self):
+        smtp = getattr(self.local, 'smtp', None)
+        if smtp is None or self.local.sent >= self.recycle_after:
+            if smtp is not None:
+                self._discard(smtp, quit=True)
+            smtp = self._connect()
+        return smtp
+
+    def _discard(self, smtp, quit=False):
+        try:
+            if quit:
+                smtp.quit()
+            else:
+                smtp.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        with self.lock:
+            if smtp in self.connections:
+                self.connections.remove(smtp)
+        self.local.smtp = None
+
+    def send(self, recipient, message):
+        check_address(recipient)  # goes into RCPT TO verbatim
+        smtp = self._connection()
+        try:
+            if smtp.has_extn('pipelining'):
+                self._send_pipelined(smtp, recipient, message)
+            else:
+                smtp.sendmail(self.envelope_from, [recipient], message)
+            self.local.sent += 1
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._discard(smtp)
+            raise
+        except smtplib.SMTPException:
+            try:
+                smtp.rset()
+            except (smtplib.SMTPException, OSError):
+                self._discard(smtp)
+            raise
+
+    def _send_pipelined(self, smtp, recipient, message):
+        """MAIL, RCPT and DATA in one write (RFC 2920), then the message body"""
+        smtp.send(f'MAIL FROM:<{self.envelope_from}>\r\nRCPT TO:<{recipient}>\r\nDATA\r\n'.encode('ascii'))
+        mail_code, mail_resp = smtp.getreply()
+        rcpt_code, rcpt_resp = smtp.getreply()
+        data_code, data_resp = smtp.getreply()
+        if mail_code != 250:
+            raise smtplib.SMTPSenderRefused(mail_code, mail_resp, self.envelope_from)
+        if rcpt_code not in (250, 251):
+            raise smtplib.SMTPRecipientsRefused({recipient: (rcpt_code, rcpt_resp)})
+        if data_code != 354:
+            raise smtplib.SMTPDataError(data_code, data_resp)
+        body = DOT_STUFF_RE.sub(b'..', message)  # message is already CRLF-terminated (build_message)
+        if not body.endswith(b'\r\n'):
+            body += b'\r\n'
+        smtp.send(body + b'.\r\n')
+        code, resp = smtp.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+    def close(self):
+        for smtp in list(self.connections):
+            self._discard(smtp, quit=True)
+
+
+def is_permanent(error):
+    code = getattr(error, 'smtp_code', None)
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code = next(iter(error.recipients.values()))[0]
+    return code is not None and 500 <= code < 600
+
+
+def dispatch(outbox, pool, limiter, workers=8, max_attempts=5, chunk=1000, wait_for_retries=True, record_every=10):
+    """Drain the outbox; returns per-message latencies of successful sends.
+
+    Outcomes are committed every record_every messages as they complete, so a
+    crash re-sends at most those plus the ones in flight.
+    """
+    latencies = []
+
+    def send_one(row):
+        msg_id, recipient, domain, message, attempts = row
+        limiter.acquire(domain)
+        start = time.perf_counter()
+        try:
+            # Date is stamped per attempt, so a retry hours later does not carry the enqueue time
+            pool.send(recipient, f'Date: {formatdate(localtime=True)}\r\n'.encode('ascii') + message)
+        except (smtplib.SMTPException, OSError) as e:
+            return msg_id, attempts + 1, f'{type(e).__name__}: {e}', is_permanent(e), None
+        except Exception as e:  # e.g. an unsendable address left in an older outbox: retrying cannot help
+            return msg_id, attempts + 1, f'{type(e).__name__}: {e}', True, None
+        return msg_id, attempts + 1, None, False, time.perf_counter() - start
+
+    def record(results):
+        outbox.record([r[:4] for r in results], max_attempts)
+        latencies.extend(r[4] for r in results if r[4] is not None)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rows = outbox.due(chunk)
+            if not rows:
+                wait = outbox.next_retry_in()
+                if wait is None or not wait_for_retries:
+                    break
+                time.sleep(wait)
+                continue
+            pending = {executor.submit(send_one, row) for row in rows}
+            results = []
+            try:
+                for future in as_completed(pending):
+                    pending.discard(future)
+                    results.append(future.result())
+                    if len(results) >= record_every:
+                        record(results)
+                        results = []
+            finally:
+                # On an interrupt, send nothing more and record what is already in flight
+                for future in pending:
+                    if not future.cancel() and future.exception() is None:
+                        results.append(future.result())
+                record(results)
+    pool.close()
+    return latencies
+
+
+def load_records(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def firestore_records(args):
+    from firestore_io import open_sink
+    sink = open_sink(args)
+    now_ms = int(time.time() * 1000)
+    for doc_id, data in sink.stream(INVITATIONS):
+        if not data.get('isUsed') and data.get('expiresAt', now_ms + 1) > now_ms:
+            yield dict(data, id=data.get('id') or doc_id)
+
+
+def synthetic_records(n):
+    domains = ['example.com', 'example.org', 'example.net']
+    for i in range(n):
+        yield {'id': f'bench-{i}', 'email': f'user{i}@{domains[i % len(domains)]}', 'displayName': f'User {i}',
+               'token': f'{i:032x}', 'tempPassword': f'Temp-{i:06d}!'}
+
+
+def parse_rate_overrides(values):
+    overrides = {}
+    for value in values or []:
+        domain, _, rate = value.partition('=')
+        overrides[domain.lower()] = float(rate)
+    return overrides
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk invitation / credentials email dispatcher')
+    parser.add_argument('input', nargs='?', help='JSON or JSON-lines file of Invitation records')
+    parser.add_argument('--from-firestore', action='store_true', help='read unused invitations from Firestore')
+    parser.add_argument('--bench', type=int, metavar='N', help='send N synthetic messages (throughput test)')
+    parser.add_argument('--kind', choices=sorted(TEMPLATES), default='invitation')
+    parser.add_argument('--outbox', default='email_outbox.sqlite3', help='durable outbox (default email_outbox.sqlite3)')
+    parser.add_argument('--smtp', default='localhost:8025', help='SMTP host:port (default localhost:8025)')
+    parser.add_argument('--starttls', action='store_true')
+    parser.add_argument('--user', help='SMTP username; password from $SMTP_PASSWORD')
+    parser.add_argument('--sender', default='Validator <no-reply@validator.local>')
+    parser.add_argument('--enterprise-name', default='Your Enterprise',
+                        help='used when a record has no enterpriseName (InvitationRepository default)')
+    parser.add_argument('--invited-by', default='Enterprise Admin')
+    parser.add_argument('--connections', type=int, default=8, help='SMTP connections / workers (default 8)')
+    parser.add_argument('--domain-rate', type=float, default=20.0,
+                        help='messages per second per recipient domain, 0 = unlimited (default 20)')
+    parser.add_argument('--rate', action='append', metavar='DOMAIN=RATE', help='per-domain rate override')
+    parser.add_argument('--max-attempts', type=int, default=5)
+    parser.add_argument('--no-wait', action='store_true', help='exit instead of waiting for scheduled retries')
+    parser.add_argument('--kt', default=EMAIL_SERVICE_KT, help='path to EmailService.kt')
+    parser.add_argument('--project', default=PROJECT_ID, help='Firebase project for --from-firestore')
+    parser.add_argument('--key', default=os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'))
+    args = parser.parse_args()
+    args.dry_run = False  # open_sink: always the real project (or FIRESTORE_EMULATOR_HOST)
+    if single_line(args.sender) != args.sender or not args.sender.isascii():
+        parser.error('--sender must be a single line of ASCII')
+    try:
+        check_address(SmtpPool.envelope_address(args.sender))
+    except InvalidRecord as e:
+        parser.error(f'--sender: {e}')
+
+    if args.bench:
+        records = synthetic_records(args.bench)
+    elif args.from_firestore:
+        records = firestore_records(args)
+    elif args.input:
+        records = load_records(args.input)
+    else:
+        parser.error('give an input file, --from-firestore or --bench N')
+
+    templates = load_templates(args.kt)
+    outbox = Outbox(args.outbox)
+    start = time.perf_counter()
+    rendered = queued = 0
+    rows, rejected = [], []
+    for record in records:
+        msg_id = f"{args.kind}:{record.get('id') or record.get('email')}"
+        try:
+            message = build_message(args.kind, record, args.sender, templates, args.enterprise_name, args.invited_by)
+        except InvalidRecord as e:
+            rejected.append((msg_id, str(record.get('email') or ''), f'{type(e).__name__}: {e}'))
+            continue
+        rows.append((msg_id, record['email'], message))
+        if len(rows) >= 500:
+            rendered, queued = rendered + len(rows), queued + outbox.enqueue(rows)
+            rows = []
+    rendered, queued = rendered + len(rows), queued + outbox.enqueue(rows)
+    outbox.reject(rejected)
+    render_s = time.perf_counter() - start
+    print(f"Rendered {rendered} messages in {render_s:.2f}s, {queued} new in outbox")
+    if rejected:
+        print(f"Rejected {len(rejected)} records that cannot be sent safely (recorded as failed), "
+              f"e.g. {rejected[0][0]}: {rejected[0][2]}", file=sys.stderr)
+
+    host, _, port = args.smtp.partition(':')
+    pool = SmtpPool(host, int(port or 25), args.sender, starttls=args.starttls,
+                    user=args.user, password=os.environ.get('SMTP_PASSWORD'))
+    limiter = DomainRateLimiter(args.domain_rate, parse_rate_overrides(args.rate))
+    start = time.perf_counter()
+    latencies = dispatch(outbox, pool, limiter, workers=args.connections, max_attempts=args.max_attempts,
+                         wait_for_retries=not args.no_wait)
+    elapsed = time.perf_counter() - start
+
+    counts = outbox.counts()
+    rate = len(latencies) / elapsed if elapsed else 0.0
+    print(f"Sent {len(latencies)} in {elapsed:.2f}s ({rate:.1f} msg/s), "
+          f"latency p50 {percentile(latencies, 50) * 1000:.1f} ms, p95 {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Outbox: {counts.get('sent', 0)} sent, {counts.get('pending', 0)} pending, {counts.get('failed', 0)} failed")
+    if counts.get('failed') or counts.get('pending'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
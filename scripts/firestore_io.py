@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Shared Firestore plumbing for the bulk scripts
+
+Collection names mirror FirestoreCollections in data/Constants.kt. Writes go
+through a BatchWriter that packs operations into Firestore's 500-operation batch
+limit and commits them with bounded concurrency. The sink behind it is either
+the real project (firebase-admin, which honours FIRESTORE_EMULATOR_HOST for the
+emulator) or MemorySink, a local fake that keeps documents in a dict and counts
+writes and bytes.
+
+Credentials follow scripts/upload-questions.js: --project / --key, or
+GOOGLE_APPLICATION_CREDENTIALS.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ID = 'validator-31e53'
+
+# FirestoreCollections (data/Constants.kt)
+USERS = 'users'
+REPORTS = 'reports'
+IN_PROGRESS_ASSESSMENTS = 'in_progress_assessments'
+CUSTOM_ASSESSMENTS = 'custom_assessments'
+INVITATIONS = 'invitations'
+
+MAX_BATCH_OPS = 500
+
+SIMPLE_FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z_0-9]*$')
+FIELD_SEGMENT_RE = re.compile(r'`(?:[^`\\]|\\.)*`|[^.]+')
+
+
+def add_firestore_args(parser):
+    parser.add_argument('--project', default=PROJECT_ID, help=f'Firebase project id (default {PROJECT_ID})')
+    parser.add_argument('--key', default=os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'),
+                        help='service account key JSON (default $GOOGLE_APPLICATION_CREDENTIALS)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='write to an in-memory fake instead of Firestore')
+
+
+def open_sink(args):
+    """FirestoreSink for the configured project, or MemorySink for --dry-run"""
+    if args.dry_run:
+        return MemorySink()
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+    except ImportError:
+        raise SystemExit('firebase-admin is required: pip install firebase-admin (or use --dry-run)')
+    if not firebase_admin._apps:
+        if args.key and not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+            firebase_admin.initialize_app(credentials.Certificate(args.key), {'projectId': args.project})
+        else:
+            firebase_admin.initialize_app(options={'projectId': args.project})
+    return FirestoreSink(firestore.client())
+
+
+def iter_export(path):
+    """Documents from a collection export: JSON lines are streamed, a JSON array is loaded whole"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def field_path(*segments):
+    """Dotted Firestore field path, backquoting segments that are not plain identifiers"""
+    return '.'.join(s if SIMPLE_FIELD_RE.match(s) else '`' + s.replace('\\', '\\\\').replace('`', '\\`') + '`'
+                    for s in segments)
+
+
+def split_field_path(path):
+    return [re.sub(r'\\(.)', r'\1', s[1:-1]) if s.startswith('`') else s for s in FIELD_SEGMENT_RE.findall(path)]
+
+
+def apply_patch(document, data):
+    """Copy of document with an update() applied: keys are field paths, values replace whole fields"""
+    document = dict(document)
+    for path, value in data.items():
+        *parents, leaf = split_field_path(path)
+        node = document
+        for segment in parents:
+            child = node.get(segment)
+            node[segment] = child = dict(child) if isinstance(child, dict) else {}
+            node = child
+        node[leaf] = value
+    return document
+
+
+def doc_size(data):
+    """Approximate stored size of a document, for the 1 MiB limit and byte accounting"""
+    return len(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def source_fingerprint(path):
+    stat = os.stat(path)
+    return f'{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}'
+
+
+class Checkpoint:
+    """Last committed position of a resumable run, invalidated when the source changes"""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.row = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('source') == source:
+                self.row = saved.get('row', 0)
+
+    def save(self, row):
+        self.row = row
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.source, 'row': row}, f)
+        os.replace(tmp, self.path)
+
+
+class FirestoreSink:
+    def __init__(self, db):
+        self.db = db
+
+    def commit(self, ops):
+        batch = self.db.batch()
+        for op, collection, doc_id, data in ops:
+            ref = self.db.collection(collection).document(doc_id)
+            if op == 'set':
+                batch.set(ref, data)
+            elif op == 'update':
+                batch.set(ref, data, merge=True)
+            elif op == 'patch':
+                batch.update(ref, data)
+            else:
+                batch.delete(ref)
+        batch.commit()
+
+    def get(self, collection, doc_id):
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def stream(self, collection):
+        for doc in self.db.collection(collection).stream():
+            yield doc.id, doc.to_dict()
+
+
+class MemorySink:
+    """Local Firestore stand-in: documents in a dict, with write and byte counters"""
+
+    def __init__(self):
+        self.collections = {}
+        self.writes = 0
+        self.bytes_written = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+
+    def commit(self, ops):
+        if len(ops) > MAX_BATCH_OPS:
+            raise ValueError(f'batch of {len(ops)} operations exceeds Firestore limit of {MAX_BATCH_OPS}')
+        with self._lock:
+            self.commits += 1
+            for op, collection, doc_id, data in ops:
+                docs = self.collections.setdefault(collection, {})
+                self.writes += 1
+                if op == 'delete':
+                    docs.pop(doc_id, None)
+                    continue
+                self.bytes_written += doc_size(data)
+                if op == 'patch':
+                    if doc_id not in docs:
+                        raise KeyError(f'patch of missing document {collection}/{doc_id}')
+                    docs[doc_id] = apply_patch(docs[doc_id], data)
+                elif op == 'update' and doc_id in docs:
+                    merged = dict(docs[doc_id])
+                    merged.update(data)
+                    docs[doc_id] = merged
+                else:
+                    docs[doc_id] = dict(data)
+
+    def get(self, collection, doc_id):
+        data = self.collections.get(collection, {}).get(doc_id)
+        return None if data is None else dict(data)
+
+    def stream(self, collection):
+        for doc_id, data in list(self.collections.get(collection, {}).items()):
+            yield doc_id, data
+
+
+class BatchWriter:
+    """Packs operations into 500-op batches and commits them on a bounded thread pool.
+
+    Each batch carries the tag of its last operation. on_checkpoint(tag) is called
+    whenever the contiguous prefix of committed batches advances, so a checkpoint
+    never claims work that is still in flight.
+    """
+
+    def __init__(self, sink, max_in_flight=4, batch_size=MAX_BATCH_OPS, on_checkpoint=None, retries=3):
+        if not 0 < batch_size <= MAX_BATCH_OPS:
+            raise ValueError(f'batch_size must be in 1..{MAX_BATCH_OPS}')
+        self.sink = sink
+        self.batch_size = batch_size
+        self.on_checkpoint = on_checkpoint
+        self.retries = retries
+        self.ops_written = 0
+        self.batches_committed = 0
+        self._ops = []
+        self._tag = None
+        self._seq = 0
+        self._done = {}
+        self._next_checkpoint = 0
+        self._futures = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def set(self, collection, doc_id, data, tag=None):
+        self._add(('set', collection, doc_id, data), tag)
+
+    def update(self, collection, doc_id, data, tag=None):
+        self._add(('update', collection, doc_id, data), tag)
+
+    def patch(self, collection, doc_id, data, tag=None):
+        """update() semantics: keys are field paths (see field_path) and the document must exist"""
+        self._add(('patch', collection, doc_id, data), tag)
+
+    def delete(self, collection, doc_id, tag=None):
+        self._add(('delete', collection, doc_id, None), tag)
+
+    def _add(self, op, tag):
+        self._ops.append(op)
+        self._tag = tag
+        if len(self._ops) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._ops:
+            return
+        ops, tag, seq = self._ops, self._tag, self._seq
+        self._ops, self._seq = [], seq + 1
+        self._slots.acquire()  # back-pressure: at most max_in_flight batches held in memory
+        self._futures.append(self._pool.submit(self._commit, seq, ops, tag))
+        self._raise_failures()
+
+    def _commit(self, seq, ops, tag):
+        try:
+            for attempt in range(self.retries):
+                try:
+                    self.sink.commit(ops)
+                    break
+                except Exception:
+                    if attempt == self.retries - 1:
+                        raise
+                    time.sleep(0.5 * 2 ** attempt)
+            with self._lock:
+                self.ops_written += len(ops)
+                self.batches_committed += 1
+                self._done[seq] = tag
+                advanced = None
+                while self._next_checkpoint in self._done:
+                    advanced = self._done.pop(self._next_checkpoint)
+                    self._next_checkpoint += 1
+                if advanced is not None and self.on_checkpoint:
+                    self.on_checkpoint(advanced)
+        finally:
+            self._slots.release()
+
+    def _raise_failures(self):
+        pending = []
+        for future in self._futures:
+            if future.done():
+                future.result()  # re-raises a failed commit in the caller
+            else:
+                pending.append(future)
+        self._futures = pending
+
+    def close(self):
+        """Flush, wait for every batch and re-raise the first failure"""
+        try:
+            self.flush()
+            for future in self._futures:
+                future.result()
+            self._futures = []
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True)
+        return False
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk import of enterprise custom assessments from CSV/XLSX
+
+One input row per question. Rows are grouped into CustomAssessment documents by
+(userId, assessmentName); rows for one assessment must be contiguous, which lets
+the file be streamed without holding it in memory. Documents are written in the
+same shape as CustomAssessmentRepository.createCustomAssessment.
+
+Columns (header names ignore case, spaces and underscores):
+    userId          required - owner of the assessment
+    assessmentName  required - CustomAssessment.name
+    questionText    required
+    description     optional - taken from the first row of each assessment
+    order           optional - defaults to the row's position in the assessment
+
+Document and question ids are derived from (userId, assessmentName), so
+re-running an import overwrites instead of duplicating. Progress is checkpointed
+to <input>.checkpoint.json after each committed batch; re-running the same
+command resumes after the last checkpoint. --dry-run neither reads nor writes
+the checkpoint. Rejected rows are written to <input>.errors.csv and the whole
+assessment they belong to is skipped. The error report is rewritten in full
+on every run, resumed or not.
+
+Usage:
+    python scripts/import_custom_assessments.py questions.csv --key key.json
+    python scripts/import_custom_assessments.py questions.xlsx --sheet Sheet1 --dry-run
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python scripts/import_custom_assessments.py questions.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import re
+import sys
+import time
+import uuid
+
+from firestore_io import (CUSTOM_ASSESSMENTS, BatchWriter, Checkpoint, MemorySink, add_firestore_args, doc_size,
+                          open_sink, source_fingerprint)
+
+MAX_DOC_BYTES = 1_000_000  # Firestore limit is 1 MiB; leave headroom for field overhead
+MAX_ORDER = 2 ** 31 - 1  # CustomQuestion.order is a Kotlin Int
+
+# Header names are matched lowercased with spaces and underscores removed
+COLUMN_ALIASES = {
+    'userid': 'userId',
+    'assessmentname': 'assessmentName',
+    'assessment': 'assessmentName',
+    'name': 'assessmentName',
+    'description': 'description',
+    'questiontext': 'questionText',
+    'question': 'questionText',
+    'order': 'order',
+}
+REQUIRED_COLUMNS = ('userId', 'assessmentName', 'questionText')
+
+
+def iter_csv_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield header
+        yield from reader
+
+
+def iter_xlsx_rows(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise SystemExit('openpyxl is required for .xlsx input: pip install openpyxl')
+    # read_only streams rows instead of loading the workbook into memory
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield ['' if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_records(path, sheet=None):
+    """Yield (row_number, record) with canonical column names; row 1 is the header"""
+    rows = iter_xlsx_rows(path, sheet) if path.lower().endswith(('.xlsx', '.xlsm')) else iter_csv_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [COLUMN_ALIASES.get(re.sub(r'[\s_]', '', h.lower())) for h in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise SystemExit(f"{path}: missing required column(s): {', '.join(missing)}")
+    for row_number, row in enumerate(rows, 2):
+        if not any(cell.strip() for cell in row):
+            continue
+        record = {}
+        for column, value in zip(columns, row):
+            if column:
+                record[column] = value.strip()
+        yield row_number, record
+
+
+def parse_order(value):
+    """Integer from an order cell; spreadsheet numbers like '3.0' are accepted, '1.5' and 'inf' are not"""
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():  # also False for inf and nan
+            raise ValueError(f'{value!r} is not a whole number')
+        return int(number)
+
+
+def assessment_id(user_id, name):
+    """Deterministic 20-char document id, like Firestore's auto ids"""
+    return hashlib.sha1(f'{user_id}\x00{name}'.encode('utf-8')).hexdigest()[:20]
+
+
+class Assessment:
+    def __init__(self, user_id, name, first_row):
+        self.user_id = user_id
+        self.name = name
+        self.description = ''
+        self.first_row = first_row
+        self.last_row = first_row
+        self.questions = []
+        self.errors = []
+
+    @property
+    def doc_id(self):
+        return assessment_id(self.user_id, self.name)
+
+    def add(self, row_number, record):
+        self.last_row = row_number
+        if not self.description and record.get('description'):
+            self.description = record['description']
+
+        text = record.get('questionText', '')
+        if not text:
+            self.errors.append((row_number, 'questionText', 'question text is empty'))
+            return
+        order = record.get('order', '')
+        if order:
+            try:
+                order = parse_order(order)
+            except ValueError:
+                self.errors.append((row_number, 'order', f'order {order!r} is not a whole number'))
+                return
+            if not 1 <= order <= MAX_ORDER:
+                self.errors.append((row_number, 'order', f'order {order} must be between 1 and {MAX_ORDER}'))
+                return
+        else:
+            order = len(self.questions) + 1
+        self.questions.append((row_number, order, text))
+
+    def validate(self):
+        seen = {}
+        for row_number, order, _ in self.questions:
+            if order in seen:
+                self.errors.append((row_number, 'order', f'order {order} duplicates row {seen[order]}'))
+            seen[order] = row_number
+        if not self.questions and not self.errors:
+            self.errors.append((self.first_row, 'questionText', 'assessment has no questions'))
+        return not self.errors
+
+    def to_document(self, now_ms):
+        """Same fields as CustomAssessmentRepository.createCustomAssessment (no 'id' field)"""
+        questions = sorted(self.questions, key=lambda q: q[1])
+        data = {
+            'userId': self.user_id,
+            'name': self.name,
+            'description': self.description,
+            'createdAt': now_ms,
+            'updatedAt': now_ms,
+            'isFromChecklist': False,
+            'sourceFda483AssessmentId': '',
+            'questions': [
+                {
+                    'id': str(uuid.uuid5(uuid.NAMESPACE_URL, f'{self.doc_id}/{order}')),
+                    'questionText': text,
+                    'order': order,
+                }
+                for _, order, text in questions
+            ],
+        }
+        size = doc_size(data)
+        if size > MAX_DOC_BYTES:
+            self.errors.append((self.first_row, 'questionText',
+                                f'assessment is {size:,} bytes, over the Firestore document limit'))
+            return None
+        return data
+
+
+def iter_assessments(records):
+    """Group contiguous rows into Assessments; yields (assessment, row_errors)"""
+    current = None
+    finished = set()
+    for row_number, record in records:
+        user_id = record.get('userId', '')
+        name = record.get('assessmentName', '')
+        if not user_id or not name:
+            field = 'userId' if not user_id else 'assessmentName'
+            yield None, [(row_number, field, f'{field} is empty')]
+            continue
+        key = (user_id, name)
+        if current is None or key != (current.user_id, current.name):
+            if current is not None:
+                finished.add(assessment_id(current.user_id, current.name))
+                yield current, []
+            if assessment_id(user_id, name) in finished:
+                yield None, [(row_number, 'assessmentName',
+                              f'rows for "{name}" are not contiguous; sort the file by userId, assessmentName')]
+                current = None
+                continue
+            current = Assessment(user_id, name, row_number)
+        current.add(row_number, record)
+    if current is not None:
+        yield current, []
+
+
+def run_import(path, sink, sheet=None, concurrency=4, batch_size=500, checkpoint_path=None, errors_path=None):
+    # A --dry-run (MemorySink) commits nothing, so it neither resumes from nor advances the checkpoint
+    checkpoint = None
+    resume_after = 0
+    if not isinstance(sink, MemorySink):
+        checkpoint = Checkpoint(checkpoint_path or path + '.checkpoint.json', source_fingerprint(path))
+        resume_after = checkpoint.row
+    stats = {'rows': 0, 'assessments': 0, 'questions': 0, 'rejected_assessments': 0,
+             'rejected_rows': 0, 'skipped_assessments': 0}
+    now_ms = int(time.time() * 1000)
+
+    with open(errors_path or path + '.errors.csv', 'w', encoding='utf-8', newline='') as ef:
+        errors = csv.writer(ef)
+        errors.writerow(['row', 'assessment', 'field', 'error'])
+        with BatchWriter(sink, max_in_flight=concurrency, batch_size=batch_size,
+                         on_checkpoint=checkpoint and checkpoint.save) as writer:
+            for assessment, row_errors in iter_assessments(iter_records(path, sheet)):
+                for row_number, field, message in row_errors:
+                    errors.writerow([row_number, '', field, message])
+                    stats['rejected_rows'] += 1
+                if assessment is None:
+                    continue
+                stats['rows'] += assessment.last_row - assessment.first_row + 1
+                # Validated before the resume skip, so the rewritten error report still lists rejections behind it
+                data = assessment.to_document(now_ms) if assessment.validate() else None
+                if data is None:
+                    for row_number, field, message in assessment.errors:
+                        errors.writerow([row_number, assessment.name, field, message])
+                    stats['rejected_rows'] += len(assessment.errors)
+                    stats['rejected_assessments'] += 1
+                    continue
+                if assessment.last_row <= resume_after:
+                    stats['skipped_assessments'] += 1
+                    continue
+                writer.set(CUSTOM_ASSESSMENTS, assessment.doc_id, data, tag=assessment.last_row)
+                stats['assessments'] += 1
+                stats['questions'] += len(data['questions'])
+    stats['batches'] = writer.batches_committed
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import custom assessments from CSV/XLSX')
+    parser.add_argument('input', help='.csv or .xlsx file, one row per question')
+    parser.add_argument('--sheet', help='worksheet name for .xlsx input (default: active sheet)')
+    parser.add_argument('--concurrency', type=int, default=4, help='batches committed in parallel (default 4)')
+    parser.add_argument('--batch-size', type=int, default=500, help='operations per batch (max 500)')
+    parser.add_argument('--checkpoint', help='checkpoint file (default <input>.checkpoint.json)')
+    parser.add_argument('--errors', help='per-row error report (default <input>.errors.csv)')
+    add_firestore_args(parser)
+    args = parser.parse_args()
+
+    sink = open_sink(args)
+    start = time.perf_counter()
+    stats = run_import(args.input, sink, sheet=args.sheet, concurrency=args.concurrency,
+                       batch_size=args.batch_size, checkpoint_path=args.checkpoint, errors_path=args.errors)
+    elapsed = time.perf_counter() - start
+
+    print(f"Imported {stats['assessments']} assessments ({stats['questions']} questions) "
+          f"in {stats['batches']} batches, {elapsed:.1f}s")
+    if stats['skipped_assessments']:
+        print(f"Skipped {stats['skipped_assessments']} assessments already imported (checkpoint)")
+    if stats['rejected_rows']:
+        print(f"Rejected {stats['rejected_assessments']} assessments, {stats['rejected_rows']} row errors - "
+              f"see {args.errors or args.input + '.errors.csv'}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
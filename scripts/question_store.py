@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Memory-compact in-memory store for the question bank
+
+Holding every Question as a dict (or a tuple of separate str objects) costs a few
+hundred bytes of object overhead per question. QuestionStore keeps the bank in a
+handful of flat buffers instead:
+
+- question ids: one UTF-8 buffer + array('I') offsets
+- subdomain ids: interned table of distinct strings, array('H') code per question
+- orders: array('H')
+- texts: one contiguous UTF-8 buffer + array('I') offsets, read through
+  zero-copy memoryview slices (text_view) or decoded on demand (text)
+
+The store is immutable once built. Lookup by question id builds a dict lazily on
+first use, so callers that only scan never pay for it.
+
+Usage:
+    python scripts/question_store.py                    # summary of the Kotlin bank
+    python scripts/question_store.py --bench [N]        # synthetic bank, asserts memory budget
+"""
+
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import namedtuple
+
+from stage_profiler import QUESTIONS_KT
+
+# Question("id", "subDomainId", "text", order) - text may contain escaped quotes
+QUESTION_RE = re.compile(r'Question\("([^"]+)",\s*"([^"]+)",\s*"((?:[^"\\]|\\.)*)",\s*(\d+)\)')
+
+# Fixed per-question cost: id offset + text offset (4 bytes each), subdomain code + order (2 bytes each)
+OVERHEAD_BUDGET_BYTES = 16
+
+Question = namedtuple('Question', ['id', 'sub_domain_id', 'text', 'order'])
+
+
+def iter_kotlin_questions(path=QUESTIONS_KT):
+    """Yield Question tuples from QualityUnitQuestions.kt in file order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for match in QUESTION_RE.finditer(content):
+        q_id, sub_domain_id, text, order = match.groups()
+        yield Question(q_id, sub_domain_id, text.replace('\\"', '"'), int(order))
+
+
+class QuestionStore:
+    """Immutable, column-oriented question bank"""
+
+    def __init__(self, questions):
+        id_buf = bytearray()
+        text_buf = bytearray()
+        self._id_offsets = array('I', [0])
+        self._text_offsets = array('I', [0])
+        self._sub_domain_codes = array('H')
+        self._orders = array('H')
+        self._sub_domains = []
+        self._sub_domain_index = {}
+        self._id_index = None
+
+        for q_id, sub_domain_id, text, order in questions:
+            code = self._sub_domain_index.get(sub_domain_id)
+            if code is None:
+                code = len(self._sub_domains)
+                self._sub_domains.append(sys.intern(sub_domain_id))
+                self._sub_domain_index[self._sub_domains[code]] = code
+            id_buf += q_id.encode('utf-8')
+            text_buf += text.encode('utf-8')
+            # array('I')/array('H') raise OverflowError past 4 GiB of text or 65535 subdomains/orders
+            self._id_offsets.append(len(id_buf))
+            self._text_offsets.append(len(text_buf))
+            self._sub_domain_codes.append(code)
+            self._orders.append(order)
+
+        # bytes, not bytearray: exported memoryviews must never block a resize
+        self._ids = bytes(id_buf)
+        self._texts = bytes(text_buf)
+        self._texts_view = memoryview(self._texts)
+
+    @classmethod
+    def from_kotlin(cls, path=QUESTIONS_KT):
+        return cls(iter_kotlin_questions(path))
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __getitem__(self, i):
+        return Question(self.question_id(i), self.sub_domain_id(i), self.text(i), self._orders[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def question_id(self, i):
+        return self._ids[self._id_offsets[i]:self._id_offsets[i + 1]].decode('utf-8')
+
+    def sub_domain_id(self, i):
+        return self._sub_domains[self._sub_domain_codes[i]]
+
+    def order(self, i):
+        return self._orders[i]
+
+    def text_view(self, i):
+        """Zero-copy UTF-8 view of question i's text"""
+        return self._texts_view[self._text_offsets[i]:self._text_offsets[i + 1]]
+
+    def text(self, i):
+        return str(self.text_view(i), 'utf-8')
+
+    @property
+    def sub_domains(self):
+        return list(self._sub_domains)
+
+    def sub_domain_code(self, sub_domain_id):
+        return self._sub_domain_index.get(sub_domain_id)
+
+    def index_of(self, q_id):
+        """Position of q_id, or None. Builds the id index on first call."""
+        if self._id_index is None:
+            self._id_index = {self.question_id(i): i for i in range(len(self))}
+        return self._id_index.get(q_id)
+
+    def indices_for_sub_domain(self, sub_domain_id):
+        """Positions of questions in a subdomain, in bank order (getQuestionsForSubDomain)"""
+        code = self._sub_domain_index.get(sub_domain_id)
+        if code is None:
+            return []
+        return [i for i, c in enumerate(self._sub_domain_codes) if c == code]
+
+    def counts_by_sub_domain(self):
+        counts = [0] * len(self._sub_domains)
+        for c in self._sub_domain_codes:
+            counts[c] += 1
+        return dict(zip(self._sub_domains, counts))
+
+    def payload_bytes(self):
+        """UTF-8 bytes of ids and texts - the irreducible part of the bank"""
+        return len(self._ids) + len(self._texts)
+
+    def nbytes(self):
+        """Bytes held by the store's buffers and tables (excluding the lazy id index)"""
+        arrays = (self._id_offsets, self._text_offsets, self._sub_domain_codes, self._orders)
+        total = self.payload_bytes() + sum(a.itemsize * len(a) for a in arrays)
+        total += sum(len(s) for s in self._sub_domains)
+        return total
+
+
+def synthetic_questions(n, sub_domains_per_domain=40, seed_texts=None):
+    """Deterministic bank of n questions spread over 6 domains"""
+    prefixes = ['qu', 'pl', 'pr', 'mt', 'lb', 'fc']
+    sub_domains = [f'{p}_area{k}' for p in prefixes for k in range(sub_domains_per_domain)]
+    texts = seed_texts or [
+        'Is there an approved SOP defining the process, responsibilities and timelines?',
+        'Are records reviewed and approved by QA before use, with audit trails retained?',
+        'Are deviations from the procedure investigated, with CAPA tracked to closure?',
+    ]
+    per_sub_domain = {}
+    for i in range(n):
+        sub_domain_id = sub_domains[i % len(sub_domains)]
+        order = per_sub_domain.get(sub_domain_id, 0) % 65535 + 1
+        per_sub_domain[sub_domain_id] = order
+        yield Question(f'{sub_domain_id}_{order}', sub_domain_id, texts[i % len(texts)], order)
+
+
+def measure(build):
+    """(result, bytes still allocated after build) via tracemalloc"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bench(n):
+    seed_texts = None
+    try:
+        seed_texts = [q.text for q in iter_kotlin_questions()]
+    except FileNotFoundError:
+        pass
+
+    start = time.perf_counter()
+    store, store_bytes = measure(lambda: QuestionStore(synthetic_questions(n, seed_texts=seed_texts)))
+    elapsed = time.perf_counter() - start
+
+    # Baseline: the same bank as a list of dicts, sampled to keep the run short
+    sample = min(n, 100_000)
+    dicts, dict_bytes = measure(lambda: [
+        {'id': q.id, 'domainId': q.sub_domain_id, 'text': q.text, 'order': q.order}
+        for q in synthetic_questions(sample, seed_texts=seed_texts)
+    ])
+    del dicts
+
+    payload = store.payload_bytes() / n
+    per_question = store_bytes / n
+    overhead = per_question - payload
+    print(f"Built {n:,} questions in {elapsed:.2f}s")
+    print(f"QuestionStore: {per_question:.1f} bytes/question "
+          f"({payload:.1f} payload + {overhead:.1f} overhead)")
+    print(f"list of dicts: {dict_bytes / sample:.1f} bytes/question (sampled {sample:,})")
+
+    assert len(store) == n
+    assert store.nbytes() <= store_bytes * 1.01, "nbytes() under-reports the store"
+    assert overhead <= OVERHEAD_BUDGET_BYTES, \
+        f"store overhead {overhead:.1f} bytes/question exceeds budget {OVERHEAD_BUDGET_BYTES}"
+    # Spot-check round trip and zero-copy views
+    probe = n // 2
+    expected = next(q for i, q in enumerate(synthetic_questions(probe + 1, seed_texts=seed_texts)) if i == probe)
+    assert store[probe] == expected
+    assert store.text_view(probe).obj is store._texts
+    assert store.index_of(expected.id) is not None
+    print("Memory budget OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact question bank store')
+    parser.add_argument('--bench', nargs='?', type=int, const=1_000_000, metavar='N',
+                        help='build a synthetic N-question bank and assert the memory budget')
+    parser.add_argument('--kt', default=QUESTIONS_KT, help='path to QualityUnitQuestions.kt')
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+
+    store = QuestionStore.from_kotlin(args.kt)
+    print(f"Loaded {len(store)} questions in {len(store.sub_domains)} subdomains, "
+          f"{store.nbytes():,} bytes ({store.nbytes() / max(len(store), 1):.1f} bytes/question)")
+    for sub_domain_id, count in store.counts_by_sub_domain().items():
+        print(f"  {sub_domain_id}: {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Parallel batch PDF rendering of assessment reports
+
+Reads exported Report documents (JSON array or JSON lines, as stored in the
+'reports' collection) and renders one PDF per report - header with Logo.png,
+compliance score and counts, the AI summary, and every question with its answer
+- into a single zip. Questions are listed in natural id order (qu_capa_2 before
+qu_capa_10), which follows the bank's numbering. This deliberately differs from
+ReportDetailScreen, whose sortedBy { it.first } is a plain string sort, so Qn
+numbers in the PDF can differ from the screen's.
+
+The PDFs are written by a small built-in writer using the standard Helvetica
+fonts, so no PDF library is needed. Everything that is identical across
+reports (font objects and metrics, the logo downsampled to 2 px per point, the
+page header template) is built once in the parent as PdfResources and handed to
+each worker process at start-up. Workers render chunks of reports; the parent streams
+finished PDFs into the zip as they complete, keeping only a bounded number of
+chunks in flight.
+
+Usage:
+    python scripts/render_report_pdfs.py reports.jsonl -o reports.zip
+    python scripts/render_report_pdfs.py reports.json -o pack.zip --facility-id F1 --since 2025-01-01 --until 2025-03-31
+    python scripts/render_report_pdfs.py --bench 5000 -o /tmp/bench.zip
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from firestore_io import iter_export
+
+LOGO_PNG = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Logo.png'))
+LOGO_WIDTH = 72  # points
+LOGO_PIXELS_PER_POINT = 2  # the logo is downsampled to this resolution once, not embedded at full size
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 48
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+# Colors from ReportDetailScreen / theme (slate-900, slate-500, blue-500)
+TEXT = (0x0F, 0x17, 0x2A)
+MUTED = (0x64, 0x74, 0x8B)
+ACCENT = (0x3B, 0x82, 0xF6)
+ANSWER_COLORS = {
+    'COMPLIANT': (0x10, 0xB9, 0x81),
+    'NON_COMPLIANT': (0xEF, 0x44, 0x44),
+    'NOT_APPLICABLE': (0x94, 0xA3, 0xB8),
+}
+ANSWER_LABELS = {'COMPLIANT': 'COMPLIANT', 'NON_COMPLIANT': 'NON-COMPLIANT', 'NOT_APPLICABLE': 'NOT APPLICABLE'}
+
+# Helvetica / Helvetica-Bold advance widths (1/1000 em) for ASCII 32..126, from the standard AFM files
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+# Characters the question bank uses that WinAnsiEncoding lacks (same spirit as fix_unicode.py)
+TEXT_REPLACEMENTS = str.maketrans({
+    '≤': '<=', '≥': '>=', '→': '->', '←': '<-', '≠': '!=', '≈': '~=', '⁻': '-', '⁶': '6',
+    'μ': 'µ',  # Greek mu (U+03BC) -> micro sign (U+00B5), which cp1252 has
+})
+
+
+class PdfResources:
+    """Objects shared by every PDF: fonts, metrics, logo XObject. Built once, pickled to workers."""
+
+    def __init__(self, logo_path=LOGO_PNG):
+        """logo_path=None renders without a logo; a path that does not exist is an error"""
+        self.widths = {'F1': self._width_table(HELVETICA_WIDTHS), 'F2': self._width_table(HELVETICA_BOLD_WIDTHS)}
+        self.objects = {
+            3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            4: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        }
+        self.logo = None
+        if logo_path:
+            width, height, pixels = decode_png(logo_path)
+            width, height, pixels = downsample(width, height, pixels, LOGO_WIDTH * LOGO_PIXELS_PER_POINT)
+            rgb, alpha = bytearray(width * height * 3), pixels[3::4]
+            rgb[0::3], rgb[1::3], rgb[2::3] = pixels[0::4], pixels[1::4], pixels[2::4]
+            rgb, alpha = zlib.compress(bytes(rgb)), zlib.compress(bytes(alpha))
+            self.objects[5] = stream_object(
+                f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB'
+                f' /BitsPerComponent 8 /SMask 6 0 R'.encode('ascii'), rgb)
+            self.objects[6] = stream_object(
+                f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray'
+                f' /BitsPerComponent 8'.encode('ascii'), alpha)
+            self.logo = (width, height)
+        xobjects = b' /XObject << /Logo 5 0 R >>' if self.logo else b''
+        self.page_resources = b'<< /Font << /F1 3 0 R /F2 4 0 R >>' + xobjects + b' >>'
+        self.header = self._header_template()
+
+    @staticmethod
+    def _width_table(ascii_widths):
+        table = [556] * 256
+        table[32:127] = ascii_widths
+        return table
+
+    def _header_template(self):
+        """Content-stream ops drawn at the top of every page"""
+        ops = []
+        top = PAGE_HEIGHT - MARGIN
+        if self.logo:
+            w = LOGO_WIDTH
+            h = w * self.logo[1] / self.logo[0]
+            ops.append(f'q {w:.2f} 0 0 {h:.2f} {MARGIN} {top - h:.2f} cm /Logo Do Q')
+        ops.append(text_op('F2', 10, PAGE_WIDTH - MARGIN - self.text_width('Assessment Report', 'F2', 10),
+                           top - 12, 'Assessment Report', MUTED))
+        ops.append(f'{rgb(MUTED)} RG 0.5 w {MARGIN} {top - 46} m {PAGE_WIDTH - MARGIN} {top - 46} l S')
+        return '\n'.join(ops)
+
+    def text_width(self, text, font, size):
+        table = self.widths[font]
+        return sum(table[b] for b in encode_text(text)) * size / 1000
+
+    def wrap(self, text, font, size, width):
+        lines = []
+        for paragraph in text.split('\n'):
+            line = ''
+            for word in paragraph.split(' '):
+                candidate = f'{line} {word}' if line else word
+                if line and self.text_width(candidate, font, size) > width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+
+def decode_png(path):
+    """(width, height, RGBA pixels) for an 8-bit RGB/RGBA PNG; RGB gets an opaque alpha channel"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos, idat = 8, []
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', chunk[:10])
+        elif kind == b'IDAT':
+            idat.append(chunk)
+        pos += 12 + length
+    if depth != 8 or color_type not in (2, 6):
+        raise ValueError(f'{path}: only 8-bit RGB/RGBA PNGs are supported')
+    channels = 4 if color_type == 6 else 3
+    raw = zlib.decompress(b''.join(idat))
+    stride = width * channels
+    pixels = bytearray(stride * height)
+    prev = bytearray(stride)
+    for y in range(height):
+        filter_type = raw[y * (stride + 1)]
+        row = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        if filter_type == 1:
+            for i in range(channels, stride):
+                row[i] = (row[i] + row[i - channels]) & 0xFF
+        elif filter_type == 2:
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, prev))
+        elif filter_type == 3:
+            for i in range(stride):
+                left = row[i - channels] if i >= channels else 0
+                row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(stride):
+                a = row[i - channels] if i >= channels else 0
+                b = prev[i]
+                c = prev[i - channels] if i >= channels else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                row[i] = (row[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        pixels[y * stride:(y + 1) * stride] = row
+        prev = row
+    if channels == 3:
+        rgba = bytearray(b'\xff' * (width * height * 4))
+        rgba[0::4], rgba[1::4], rgba[2::4] = pixels[0::3], pixels[1::3], pixels[2::3]
+        return width, height, rgba
+    return width, height, pixels
+
+
+def downsample(width, height, pixels, new_width):
+    """Box-filter RGBA pixels down to new_width (if wider), weighting colour by alpha so edges get no dark fringe"""
+    if width <= new_width:
+        return width, height, pixels
+    new_height = max(1, round(height * new_width / width))
+    xs = [(x * width // new_width, max((x + 1) * width // new_width, x * width // new_width + 1))
+          for x in range(new_width)]
+    out = bytearray(new_width * new_height * 4)
+    for y in range(new_height):
+        y0 = y * height // new_height
+        y1 = max((y + 1) * height // new_height, y0 + 1)
+        for x, (x0, x1) in enumerate(xs):
+            r = g = b = a = 0
+            for sy in range(y0, y1):
+                row = sy * width * 4
+                for i in range(row + x0 * 4, row + x1 * 4, 4):
+                    alpha = pixels[i + 3]
+                    r += pixels[i] * alpha
+                    g += pixels[i + 1] * alpha
+                    b += pixels[i + 2] * alpha
+                    a += alpha
+            o = (y * new_width + x) * 4
+            if a:
+                out[o:o + 4] = bytes((r // a, g // a, b // a, a // ((y1 - y0) * (x1 - x0))))
+    return new_width, new_height, out
+
+
+def stream_object(dictionary_prefix, compressed):
+    return (dictionary_prefix + f' /Filter /FlateDecode /Length {len(compressed)} >>\nstream\n'.encode('ascii')
+            + compressed + b'\nendstream')
+
+
+def encode_text(text):
+    return text.translate(TEXT_REPLACEMENTS).encode('cp1252', 'replace')
+
+
+def pdf_string(text):
+    data = encode_text(text)
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def rgb(color):
+    return ' '.join(f'{c / 255:.3f}' for c in color)
+
+
+def text_op(font, size, x, y, text, color=TEXT):
+    return f'BT /{font} {size} Tf {rgb(color)} rg {x:.2f} {y:.2f} Td {pdf_string(text).decode("latin-1")} Tj ET'
+
+
+class PageLayout:
+    """Top-to-bottom flow layout producing one content stream per page"""
+
+    def __init__(self, resources):
+        self.res = resources
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        self.ops = [self.res.header]
+        self.pages.append(self.ops)
+        self.y = PAGE_HEIGHT - MARGIN - 64
+
+    def ensure(self, height):
+        if self.y - height < MARGIN + 24:
+            self._new_page()
+
+    def space(self, height):
+        self.y -= height
+
+    def paragraph(self, text, font='F1', size=10, color=TEXT, indent=0, leading=1.35):
+        line_height = size * leading
+        for line in self.res.wrap(text, font, size, CONTENT_WIDTH - indent):
+            self.ensure(line_height)
+            self.y -= line_height
+            self.ops.append(text_op(font, size, MARGIN + indent, self.y, line, color))
+
+    def heading(self, text, size=13):
+        self.ensure(size * 3)
+        self.space(size * 0.6)
+        self.paragraph(text, 'F2', size)
+        self.space(4)
+
+    def bar(self, segments, height=10):
+        """Horizontal stacked bar of (fraction, color)"""
+        self.ensure(height + 6)
+        self.y -= height
+        x = MARGIN
+        for fraction, color in segments:
+            w = CONTENT_WIDTH * fraction
+            if w > 0:
+                self.ops.append(f'{rgb(color)} rg {x:.2f} {self.y:.2f} {w:.2f} {height} re f')
+            x += w
+
+    def footers(self, label):
+        total = len(self.pages)
+        for number, ops in enumerate(self.pages, 1):
+            ops.append(text_op('F1', 8, MARGIN, MARGIN - 8, label, MUTED))
+            page_label = f'Page {number} of {total}'
+            x = PAGE_WIDTH - MARGIN - self.res.text_width(page_label, 'F1', 8)
+            ops.append(text_op('F1', 8, x, MARGIN - 8, page_label, MUTED))
+
+
+def natural_key(question_id):
+    """qu_apqr_10 sorts after qu_apqr_9 (ReportDetailScreen's string sort puts it before qu_apqr_2)"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', question_id)]
+
+
+def parse_summary(ai_summary):
+    """Same structure FormattedAISummary reads; None if not JSON"""
+    try:
+        data = json.loads(ai_summary)
+    except (ValueError, TypeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def layout_report(report, res):
+    page = PageLayout(res)
+    domain = report.get('domainName', '')
+    if report.get('subDomainName'):
+        domain = f"{domain} > {report['subDomainName']}"
+    page.paragraph(domain, size=10, color=MUTED)
+    page.paragraph(report.get('assessmentName') or 'Assessment', 'F2', 18)
+    details = [report.get('facilityName', ''), report.get('userName') or report.get('userEmail', '')]
+    completed_at = report.get('completedAt')
+    if completed_at:
+        details.append(datetime.fromtimestamp(completed_at / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))
+    page.paragraph('  |  '.join(d for d in details if d), size=10, color=MUTED)
+
+    compliant = report.get('compliantCount', 0)
+    non_compliant = report.get('nonCompliantCount', 0)
+    not_applicable = report.get('notApplicableCount', 0)
+    total = report.get('totalQuestions') or (compliant + non_compliant + not_applicable)
+    # Same formula as ReportDetailScreen: N/A answers are excluded
+    score = compliant * 100 // (compliant + non_compliant) if compliant + non_compliant else 0
+    page.heading('Compliance Score')
+    page.paragraph(f'{score}%', 'F2', 22, ACCENT)
+    page.space(4)
+    if total:
+        page.bar([(compliant / total, ANSWER_COLORS['COMPLIANT']),
+                  (non_compliant / total, ANSWER_COLORS['NON_COMPLIANT']),
+                  (not_applicable / total, ANSWER_COLORS['NOT_APPLICABLE'])])
+    page.space(4)
+    page.paragraph(f'Total {total}   Compliant {compliant}   Non-Compliant {non_compliant}   N/A {not_applicable}',
+                   size=10, color=MUTED)
+
+    ai_summary = report.get('aiSummary', '')
+    if ai_summary:
+        page.heading('Assessment Summary')
+        summary = parse_summary(ai_summary)
+        if summary is None:
+            page.paragraph(ai_summary)
+        else:
+            sections = [('Key Strengths:', summary.get('strengths', [])),
+                        ('Critical Areas for Improvement:', summary.get('issues', [])),
+                        ('Next Steps:', summary.get('next_steps', []))]
+            for title, items in sections:
+                if not items:
+                    continue
+                page.space(4)
+                page.paragraph(title, 'F2', 10)
+                for item in items:
+                    if isinstance(item, dict):
+                        page.paragraph(f"- {item.get('area', '')}: {item.get('problem', '')}", indent=8)
+                        for label, key in (('How to improve', 'improvement'), ('Where', 'where'), ('How', 'how')):
+                            if item.get(key):
+                                page.paragraph(f'{label}: {item[key]}', size=9, color=MUTED, indent=18)
+                    else:
+                        page.paragraph(f'- {item}', indent=8)
+
+    responses = report.get('responses') or {}
+    question_texts = report.get('questionTexts') or {}
+    if responses:
+        page.heading('Detailed Responses')
+        for number, question_id in enumerate(sorted(responses, key=natural_key), 1):
+            answer = responses[question_id]
+            text = question_texts.get(question_id, question_id)
+            page.ensure(40)
+            page.space(6)
+            page.paragraph(f'Q{number}. {text}', size=10)
+            page.paragraph(ANSWER_LABELS.get(answer, answer), 'F2', 8,
+                           ANSWER_COLORS.get(answer, MUTED), indent=18)
+
+    page.footers(f"Report {report.get('id', '')}")
+    return page.pages
+
+
+def render_pdf(report, res):
+    pages = layout_report(report, res)
+    objects = dict(res.objects)
+    page_refs = []
+    for i, ops in enumerate(pages):
+        page_num, content_num = 7 + 2 * i, 8 + 2 * i
+        page_refs.append(f'{page_num} 0 R')
+        content = zlib.compress('\n'.join(ops).encode('latin-1'), 6)
+        objects[content_num] = stream_object(b'<<', content)
+        objects[page_num] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]'
+                             f' /Contents {content_num} 0 R /Resources ').encode('ascii') + res.page_resources + b' >>'
+    title = pdf_string(report.get('assessmentName', ''))
+    objects[1] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(page_refs)}] /Count {len(pages)} >>'.encode('ascii')
+    info_num = max(objects) + 1
+    objects[info_num] = b'<< /Title ' + title + b' /Producer (GxPrime render_report_pdfs) >>'
+
+    out = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n']
+    offsets = {}
+    size = len(out[0])
+    for num in sorted(objects):
+        offsets[num] = size
+        chunk = f'{num} 0 obj\n'.encode('ascii') + objects[num] + b'\nendobj\n'
+        out.append(chunk)
+        size += len(chunk)
+    count = max(objects) + 1
+    xref = [f'xref\n0 {count}\n0000000000 65535 f \n']
+    for num in range(1, count):
+        if num in offsets:
+            xref.append(f'{offsets[num]:010d} 00000 n \n')
+        else:
+            xref.append('0000000000 65535 f \n')
+    out.append(''.join(xref).encode('ascii'))
+    out.append(f'trailer\n<< /Size {count} /Root 1 0 R /Info {info_num} 0 R >>\nstartxref\n{size}\n%%EOF\n'
+               .encode('ascii'))
+    return b''.join(out)
+
+
+def archive_name(report):
+    def clean(value):
+        return re.sub(r'[^A-Za-z0-9._-]+', '_', value).strip('_') or 'untitled'
+    completed_at = report.get('completedAt')
+    date = datetime.fromtimestamp(completed_at / 1000, timezone.utc).strftime('%Y-%m-%d') if completed_at else 'undated'
+    facility = clean(report.get('facilityName') or report.get('facilityId') or 'no_facility')
+    return f"{facility}/{date}_{clean(report.get('assessmentName', ''))}_{clean(report.get('id', ''))}.pdf"
+
+
+# Worker-process state, set once by the pool initializer
+_resources = None
+
+
+def _init_worker(resources):
+    global _resources
+    _resources = resources
+
+
+def _render_chunk(reports):
+    return [(archive_name(report), render_pdf(report, _resources)) for report in reports]
+
+
+def parse_date_ms(value, end_of_day=False):
+    dt = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    ms = int(dt.timestamp() * 1000)
+    return ms + 86_400_000 - 1 if end_of_day else ms
+
+
+def select_reports(reports, facility_id=None, since_ms=None, until_ms=None):
+    for report in reports:
+        if facility_id and report.get('facilityId') != facility_id:
+            continue
+        completed_at = report.get('completedAt', 0)
+        if since_ms is not None and completed_at < since_ms:
+            continue
+        if until_ms is not None and completed_at > until_ms:
+            continue
+        yield report
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_to_zip(reports, output, resources, workers=None, chunk_size=32):
+    """Render reports across a process pool, streaming PDFs into a zip; returns (count, bytes)"""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    count = total_bytes = 0
+    names = set()
+
+    def write(results):
+        nonlocal count, total_bytes
+        for name, pdf in results:
+            if name in names:
+                base, ext = os.path.splitext(name)
+                name = f'{base}_{count}{ext}'
+            names.add(name)
+            # PDF content streams are already deflated; storing avoids recompressing in the parent
+            zf.writestr(zipfile.ZipInfo(name, date_time=time.localtime()[:6]), pdf, zipfile.ZIP_STORED)
+            count += 1
+            total_bytes += len(pdf)
+
+    with zipfile.ZipFile(output, 'w', allowZip64=True) as zf, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(resources,)) as pool:
+        in_flight = set()
+        for chunk in chunked(reports, chunk_size):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            in_flight.add(pool.submit(_render_chunk, chunk))
+        for future in in_flight:
+            write(future.result())
+    return count, total_bytes
+
+
+def synthetic_reports(n, questions_per_report=25):
+    answers = ['COMPLIANT', 'COMPLIANT', 'NON_COMPLIANT', 'NOT_APPLICABLE']
+    summary = json.dumps({
+        'strengths': ['Documented SOPs are approved and current', 'Training records are complete'],
+        'issues': [{'area': 'CAPA', 'problem': 'Effectiveness checks are not documented',
+                    'improvement': 'Define effectiveness criteria before closure', 'where': 'CAPA SOP section 6',
+                    'how': 'Add a mandatory effectiveness check field to the CAPA form'}],
+        'next_steps': ['Update the CAPA SOP', 'Retrain CAPA owners within 30 days'],
+    })
+    base = 1_735_689_600_000  # 2025-01-01
+    for i in range(n):
+        responses = {f'qu_capa_{q}': answers[(i + q) % len(answers)] for q in range(1, questions_per_report + 1)}
+        texts = {qid: f'Is requirement {qid} implemented, documented and reviewed by QA at the defined frequency '
+                      f'with records retained per the data integrity policy (ALCOA+)?' for qid in responses}
+        counts = {a: sum(1 for v in responses.values() if v == a) for a in answers}
+        yield {
+            'id': f'report{i:07d}', 'assessmentName': f'Quarterly CAPA review {i}', 'facilityId': f'F{i % 5}',
+            'facilityName': f'Plant {i % 5}', 'domainName': 'Quality Unit', 'subDomainName': 'CAPA',
+            'userName': 'Auditor', 'totalQuestions': questions_per_report, 'compliantCount': counts['COMPLIANT'],
+            'nonCompliantCount': counts['NON_COMPLIANT'], 'notApplicableCount': counts['NOT_APPLICABLE'],
+            'completedAt': base + i * 3_600_000, 'responses': responses, 'questionTexts': texts, 'aiSummary': summary,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render exported reports to a zip of PDFs')
+    parser.add_argument('input', nargs='?', help='reports export (JSON array or JSON lines)')
+    parser.add_argument('-o', '--output', default='reports.zip')
+    parser.add_argument('--facility-id', help='only reports for this facilityId')
+    parser.add_argument('--since', help='completedAt on or after YYYY-MM-DD (UTC)')
+    parser.add_argument('--until', help='completedAt on or before YYYY-MM-DD (UTC)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=32, help='reports per worker task (default 32)')
+    parser.add_argument('--logo', help='logo PNG (default: Logo.png at the repository root)')
+    parser.add_argument('--no-logo', action='store_true', help='render without the logo')
+    parser.add_argument('--bench', type=int, metavar='N', help='render N synthetic reports and report throughput')
+    args = parser.parse_args()
+
+    if args.bench:
+        reports = synthetic_reports(args.bench)
+    elif args.input:
+        reports = select_reports(
+            iter_export(args.input), args.facility_id,
+            parse_date_ms(args.since) if args.since else None,
+            parse_date_ms(args.until, end_of_day=True) if args.until else None,
+        )
+    else:
+        parser.error('give a reports export or --bench N')
+
+    if args.logo and not os.path.isfile(args.logo):
+        parser.error(f'--logo {args.logo}: no such file')
+    logo = None if args.no_logo else args.logo or LOGO_PNG
+    if logo == LOGO_PNG and not os.path.isfile(LOGO_PNG):
+        parser.error(f'{LOGO_PNG} not found; pass --logo PATH or --no-logo')
+
+    start = time.perf_counter()
+    resources = PdfResources(logo)
+    setup_s = time.perf_counter() - start
+    count, total_bytes = render_to_zip(reports, args.output, resources, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed * 60 if elapsed else 0.0
+    print(f"Rendered {count} reports ({total_bytes / 1e6:.1f} MB) into {args.output} in {elapsed:.1f}s "
+          f"({rate:,.0f} reports/min, {setup_s:.2f}s shared resource setup)")
+    if count == 0:
+        print('No reports matched the filters', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Criticality-weighted compliance scoring for assessment reports
+
+Reports store raw counts (compliantCount / nonCompliantCount / notApplicableCount),
+so a non-compliance on a sterility question weighs the same as one on a
+documentation question. This script:
+
+1. Derives a weight for every question in QualityUnitQuestions.kt from
+   configurable rules: a base weight per subdomain, times a multiplier for each
+   keyword feature found in the question text (sterility, data integrity,
+   patient safety, ...). Weights are cached per bank version - a hash of the
+   Kotlin file plus the rules - in --cache-dir.
+2. Encodes every report's responses once into a sparse report x (2 * questions)
+   matrix with interleaved columns: for question j, column 2j marks "answered
+   COMPLIANT" and column 2j + 1 marks "answered NON_COMPLIANT"; NOT_APPLICABLE
+   is left out, as in ReportDetailScreen's score. Interleaving lets new
+   question ids get columns while the export is streamed.
+   The encoded matrix is cached next to the export, keyed on its size and mtime.
+3. Scores all reports with one sparse matrix x weight-matrix product, where
+   rows 2j and 2j + 1 of the weight matrix are [w_j, 0] and [w_j, w_j]:
+       [applicable, non_compliant] = M @ W
+       weighted score = 100 * (applicable - non_compliant) / applicable
+   With scipy installed this runs as a single sparse product; otherwise an
+   equivalent pure-Python loop over the CSR rows is used.
+
+Re-scoring after a rules change only recomputes the weight vector and the product.
+
+Usage:
+    python scripts/score_reports.py reports.jsonl -o scores.csv [--rules rules.json]
+    python scripts/score_reports.py --show-weights
+    python scripts/score_reports.py --bench 1000000
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+
+from firestore_io import iter_export, source_fingerprint
+from question_store import QuestionStore
+from stage_profiler import QUESTIONS_KT
+
+DEFAULT_CACHE_DIR = '.score_cache'
+
+ANSWER_OFFSET = {'COMPLIANT': 0, 'NON_COMPLIANT': 1}
+
+# Weight = subdomain base weight x product of matched keyword multipliers, clamped to [min, max].
+# Pass --rules with a JSON file of the same shape to override.
+DEFAULT_RULES = {
+    'default_weight': 1.0,
+    'min_weight': 0.5,
+    'max_weight': 5.0,
+    'sub_domains': {
+        'qu_data_integrity': 2.0,
+        'lb_data_integrity': 2.0,
+        'pr_media_fills': 2.0,
+        'pr_contamination': 2.0,
+        'lb_penicillin': 2.0,
+        'pr_potent_drugs': 1.75,
+        'fc_env_monitoring': 1.5,
+        'fc_gowning': 1.5,
+        'fc_water': 1.5,
+        'qu_csv': 1.5,
+        'lb_systems': 1.5,
+        'lb_oos_oot': 1.5,
+        'qu_field_alerts': 1.5,
+        'qu_disposition': 1.5,
+        'pr_batch_release': 1.5,
+        'qu_complaint_mgmt': 1.25,
+        'qu_investigations': 1.25,
+        'qu_capa': 1.25,
+    },
+    'keywords': [
+        {'feature': 'sterility', 'multiplier': 1.75,
+         'pattern': r'\b(steril\w*|aseptic\w*|media fills?|endotoxin\w*|bioburden|SAL)\b'},
+        {'feature': 'data_integrity', 'multiplier': 1.5,
+         'pattern': r'\b(data integrity|ALCOA\+?|audit trails?|Part 11|Annex 11|falsif\w*|backdat\w*)'},
+        {'feature': 'patient_safety', 'multiplier': 1.5,
+         'pattern': r'\b(patients?|safety|adverse|recalls?|counterfeit\w*|tamper\w*)\b'},
+        {'feature': 'contamination', 'multiplier': 1.25,
+         'pattern': r'\b(cross-contamination|contaminat\w*|penicillin|potent|PDE|MAC)\b'},
+        {'feature': 'release', 'multiplier': 1.25,
+         'pattern': r'\b(OOS|out-of-specification|batch release|disposition)\b'},
+        {'feature': 'documentation', 'multiplier': 0.9,
+         'pattern': r'\b(formatting|archiv\w*|filing|logbooks?|templates?)\b'},
+    ],
+}
+
+
+def load_rules(path=None):
+    if not path:
+        return DEFAULT_RULES
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    return dict(DEFAULT_RULES, **rules)
+
+
+def bank_version(kt_path, rules):
+    digest = hashlib.sha256()
+    with open(kt_path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(json.dumps(rules, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def derive_weights(store, rules):
+    """{question_id: (weight, [features])} for every question in the bank"""
+    keywords = [(k['feature'], k['multiplier'], re.compile(k['pattern'], re.I)) for k in rules['keywords']]
+    base_weights = rules['sub_domains']
+    weights = {}
+    for i in range(len(store)):
+        weight = base_weights.get(store.sub_domain_id(i), rules['default_weight'])
+        text = store.text(i)
+        features = []
+        for feature, multiplier, pattern in keywords:
+            if pattern.search(text):
+                weight *= multiplier
+                features.append(feature)
+        weight = min(rules['max_weight'], max(rules['min_weight'], weight))
+        weights[store.question_id(i)] = (round(weight, 4), features)
+    return weights
+
+
+def cached_weights(kt_path, rules, cache_dir):
+    """Weights for the current bank version, computed at most once per version"""
+    version = bank_version(kt_path, rules)
+    path = os.path.join(cache_dir, f'weights-{version}.json')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return version, {q_id: tuple(value) for q_id, value in json.load(f).items()}
+    weights = derive_weights(QuestionStore.from_kotlin(kt_path), rules)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(weights, f)
+    return version, weights
+
+
+class EncodedReports:
+    """Binary CSR matrix of reports x (2 * columns); see module docstring for the column layout"""
+
+    def __init__(self):
+        self.report_ids = []
+        self.columns = []
+        self.column_index = {}
+        self.indptr = array('Q', [0])
+        self.indices = array('I')
+
+    def column(self, question_id):
+        j = self.column_index.get(question_id)
+        if j is None:
+            j = self.column_index[question_id] = len(self.columns)
+            self.columns.append(question_id)
+        return j
+
+    def add(self, report):
+        self.report_ids.append(report.get('id', ''))
+        row = []
+        for question_id, answer in (report.get('responses') or {}).items():
+            offset = ANSWER_OFFSET.get(answer)
+            if offset is not None:
+                row.append((self.column(question_id), offset))
+        # Interleaved columns: question j is 2j when compliant, 2j + 1 when non-compliant
+        self.indices.extend(2 * j + offset for j, offset in row)
+        self.indptr.append(len(self.indices))
+
+    @classmethod
+    def from_reports(cls, reports):
+        encoded = cls()
+        for report in reports:
+            encoded.add(report)
+        return encoded
+
+    def save(self, directory, source):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'indptr.bin'), 'wb') as f:
+            self.indptr.tofile(f)
+        with open(os.path.join(directory, 'indices.bin'), 'wb') as f:
+            self.indices.tofile(f)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'columns': self.columns, 'report_ids': self.report_ids}, f)
+
+    @classmethod
+    def load(cls, directory, source):
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('source') != source:
+            return None
+        encoded = cls()
+        encoded.columns = meta['columns']
+        encoded.column_index = {q_id: j for j, q_id in enumerate(encoded.columns)}
+        encoded.report_ids = meta['report_ids']
+        for name, arr in (('indptr.bin', encoded.indptr), ('indices.bin', encoded.indices)):
+            path = os.path.join(directory, name)
+            del arr[:]
+            with open(path, 'rb') as f:
+                arr.frombytes(f.read())
+        return encoded
+
+
+def weight_vectors(encoded, weights, default_weight):
+    """Per interleaved column 2j + a: weight toward applicable, weight toward non-compliant"""
+    applicable = array('d')
+    non_compliant = array('d')
+    for question_id in encoded.columns:
+        w = weights.get(question_id, (default_weight,))[0]
+        applicable.extend((w, w))
+        non_compliant.extend((0.0, w))
+    return applicable, non_compliant
+
+
+def have_scipy():
+    try:
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def score(encoded, applicable, non_compliant):
+    """(applicable weight, non-compliant weight, compliant count, non-compliant count) arrays per report"""
+    if have_scipy():
+        return _score_scipy(encoded, applicable, non_compliant)
+    return _score_python(encoded, applicable, non_compliant)
+
+
+def _score_scipy(encoded, applicable, non_compliant):
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    n_rows = len(encoded.indptr) - 1
+    indices = np.frombuffer(encoded.indices, dtype=np.uint32)
+    indptr = np.frombuffer(encoded.indptr, dtype=np.uint64)
+    matrix = csr_matrix((np.ones(len(indices), dtype=np.float64), indices, indptr), shape=(n_rows, len(applicable)))
+    parity = np.tile(np.array([0.0, 1.0]), len(applicable) // 2)
+    weights = np.column_stack([np.frombuffer(applicable), np.frombuffer(non_compliant), 1.0 - parity, parity])
+    product = matrix @ weights
+    return tuple(array('d', product[:, k].tobytes()) for k in range(4))
+
+
+def _score_python(encoded, applicable, non_compliant):
+    get_applicable = applicable.__getitem__
+    get_non_compliant = non_compliant.__getitem__
+    out_applicable, out_non_compliant = array('d'), array('d')
+    out_compliant_count, out_non_compliant_count = array('d'), array('d')
+    indptr, indices = encoded.indptr, encoded.indices
+    for r in range(len(indptr) - 1):
+        row = indices[indptr[r]:indptr[r + 1]]
+        nc_count = sum(j & 1 for j in row)
+        out_applicable.append(sum(map(get_applicable, row)))
+        out_non_compliant.append(sum(map(get_non_compliant, row)))
+        out_compliant_count.append(len(row) - nc_count)
+        out_non_compliant_count.append(nc_count)
+    return out_applicable, out_non_compliant, out_compliant_count, out_non_compliant_count
+
+
+def percent(numerator, denominator):
+    return 100.0 * numerator / denominator if denominator else 0.0
+
+
+def synthetic_encoded(n, question_ids, questions_per_report=25):
+    """Pre-encoded bank of n reports, skipping JSON parsing so the bench isolates scoring"""
+    encoded = EncodedReports()
+    for q_id in question_ids:
+        encoded.column(q_id)
+    n_questions = len(question_ids)
+    encoded.report_ids = [f'report{i:07d}' for i in range(n)]
+    for i in range(n):
+        start = (i * questions_per_report) % n_questions
+        for k in range(questions_per_report):
+            j = (start + k) % n_questions
+            answer = (i + k) % 4
+            if answer < 3:  # 0, 1 compliant; 2 non-compliant; 3 not applicable
+                encoded.indices.append(2 * j + (answer == 2))
+        encoded.indptr.append(len(encoded.indices))
+    return encoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Criticality-weighted compliance scoring of reports')
+    parser.add_argument('input', nargs='?', help='reports export (JSON array or JSON lines)')
+    parser.add_argument('-o', '--output', default='scores.csv')
+    parser.add_argument('--rules', help='JSON weighting rules (see DEFAULT_RULES)')
+    parser.add_argument('--kt', default=QUESTIONS_KT, help='path to QualityUnitQuestions.kt')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'weight/matrix cache (default {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--show-weights', action='store_true', help='print the weight of every question and exit')
+    parser.add_argument('--bench', type=int, metavar='N', help='score N synthetic reports and report timings')
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules)
+    start = time.perf_counter()
+    version, weights = cached_weights(args.kt, rules, args.cache_dir)
+    weights_s = time.perf_counter() - start
+
+    if args.show_weights:
+        for question_id, (weight, features) in sorted(weights.items(), key=lambda item: -item[1][0]):
+            print(f"{weight:6.3f}  {question_id:28s} {', '.join(features)}")
+        return
+
+    start = time.perf_counter()
+    if args.bench:
+        encoded = synthetic_encoded(args.bench, list(weights))
+    elif args.input:
+        matrix_dir = os.path.join(args.cache_dir, 'matrix-' + hashlib.sha1(
+            os.path.abspath(args.input).encode('utf-8')).hexdigest()[:12])
+        fingerprint = source_fingerprint(args.input)
+        encoded = EncodedReports.load(matrix_dir, fingerprint)
+        if encoded is None:
+            encoded = EncodedReports.from_reports(iter_export(args.input))
+            encoded.save(matrix_dir, fingerprint)
+    else:
+        parser.error('give a reports export, --show-weights or --bench N')
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    applicable, non_compliant = weight_vectors(encoded, weights, rules['default_weight'])
+    totals, failures, compliant_counts, non_compliant_counts = score(encoded, applicable, non_compliant)
+    score_s = time.perf_counter() - start
+
+    if args.bench and have_scipy():
+        # The sparse product must agree with the reference loop (up to summation order)
+        expected = _score_python(encoded, applicable, non_compliant)
+        actual = (totals, failures, compliant_counts, non_compliant_counts)
+        for name, want, got in zip(('applicable', 'non-compliant', 'compliant count', 'non-compliant count'),
+                                   expected, actual):
+            assert len(want) == len(got) and all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+                                                 for a, b in zip(want, got)), f'scipy {name} differs from reference'
+        print("scipy scores match the pure-Python reference")
+
+    if not args.bench:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['reportId', 'score', 'weightedScore', 'weightedNonCompliance', 'bankVersion'])
+            for i, report_id in enumerate(encoded.report_ids):
+                raw = percent(compliant_counts[i], compliant_counts[i] + non_compliant_counts[i])
+                writer.writerow([report_id, f'{raw:.1f}', f'{percent(totals[i] - failures[i], totals[i]):.1f}',
+                                 f'{failures[i]:.3f}', version])
+
+    unknown = sum(1 for q_id in encoded.columns if q_id not in weights)
+    print(f"Bank version {version}: {len(weights)} weighted questions ({weights_s * 1000:.0f} ms)")
+    print(f"Encoded {len(encoded.report_ids):,} reports, {len(encoded.indices):,} answers ({encode_s:.2f}s)")
+    print(f"Scored in {score_s:.2f}s" + ('' if args.bench else f" -> {args.output}"))
+    if unknown:
+        print(f"{unknown} question id(s) not in the bank were weighted {rules['default_weight']}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling and pattern match instrumentation for the question bank scripts
+
+Every update script reports its stages (read, one per subdomain, write) through a
+Profiler. Pattern replacements go through Stage.sub, which counts per question id
+whether the pattern matched once, matched nothing (missed) or matched more than
+once (ambiguous - re.sub(..., count=1) only rewrites the first hit).
+
+Profiling is switched on with --profile[=PATH] (default: <script>.profile.json).
+Add --chrome-trace to write the Chrome trace event format instead, which opens in
+chrome://tracing or https://ui.perfetto.dev. Without --profile only the match
+counters are kept, so the scripts run at their original speed.
+
+QUESTIONS_KT is the live bank the app ships, and every update script rewrites
+it with the text embedded in the script, which would revert later edits such as
+fix_unicode.py's ASCII normalisation. So a run is a dry run unless it is given
+--write (rewrite QUESTIONS_KT) or --out PATH (write the result elsewhere for
+diffing), and even then nothing is written if any pattern missed. Unknown
+options are an error, so a mistyped flag cannot fall through to a write.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+QUESTIONS_KT = 'app/src/main/java/com/pramod/validator/data/QualityUnitQuestions.kt'
+
+
+class Stage:
+    """Match counters for one stage; timing and memory are filled in by Profiler."""
+
+    def __init__(self, name, profiled=False, dry_run=False, out=None):
+        self.name = name
+        self.profiled = profiled
+        self.dry_run = dry_run
+        self.out = out
+        self.matched = 0
+        self.missed = 0
+        self.ambiguous = 0
+        self.missed_ids = []
+        self.questions = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_mem_bytes = 0
+        self.start_us = 0
+
+    def sub(self, pattern, replacement, content, q_id):
+        """re.sub(pattern, replacement, content, count=1), recording the outcome for q_id"""
+        content, n = re.subn(pattern, replacement, content, count=1)
+        if n == 0:
+            self.missed += 1
+            self.missed_ids.append(q_id)
+            outcome = 'missed'
+        else:
+            self.matched += 1
+            outcome = 'matched'
+            # Only pay for the second scan when profiling
+            if self.profiled and len(re.findall(pattern, content)) > 1:
+                self.ambiguous += 1
+                outcome = 'ambiguous'
+        if self.profiled:
+            counts = self.questions.setdefault(q_id, {'matched': 0, 'missed': 0, 'ambiguous': 0})
+            counts[outcome] += 1
+        return content
+
+    def read_text(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.bytes_in += len(data)
+        return data.decode('utf-8')
+
+    def write_text(self, path, content):
+        """Write content to path, to --out instead if given, or nowhere on a dry run"""
+        data = content.encode('utf-8')
+        self.bytes_out += len(data)
+        if self.dry_run:
+            return
+        with open(self.out or path, 'wb') as f:
+            f.write(data)
+
+    def summary(self):
+        text = f"{self.matched} matched, {self.missed} missed"
+        if self.profiled:
+            text += f", {self.ambiguous} ambiguous"
+        if self.missed_ids:
+            text += f" [missed: {', '.join(self.missed_ids)}]"
+        return text
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'wall_s': round(self.wall_s, 6),
+            'cpu_s': round(self.cpu_s, 6),
+            'peak_mem_bytes': self.peak_mem_bytes,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'matched': self.matched,
+            'missed': self.missed,
+            'ambiguous': self.ambiguous,
+            'questions': self.questions,
+        }
+
+
+class _StageContext:
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            tracemalloc.reset_peak()
+            self._wall = time.perf_counter()
+            self._cpu = time.process_time()
+            self.stage.start_us = int((self._wall - self.profiler.t0) * 1e6)
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler.enabled:
+            self.stage.wall_s = time.perf_counter() - self._wall
+            self.stage.cpu_s = time.process_time() - self._cpu
+            self.stage.peak_mem_bytes = tracemalloc.get_traced_memory()[1]
+        self.profiler.stages.append(self.stage)
+        return False
+
+
+class Profiler:
+    """Collects stages for one script run and writes the trace on dump()."""
+
+    def __init__(self, script, trace_path=None, chrome_trace=False, write=False, out=None):
+        self.script = script
+        self.trace_path = trace_path
+        self.chrome_trace = chrome_trace
+        self.write = write or out is not None
+        self.out = out
+        self.refused = False
+        self.enabled = trace_path is not None
+        self.stages = []
+        self.t0 = time.perf_counter()
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'script'
+        parser = argparse.ArgumentParser(description=f"{script} (profiling options)")
+        parser.add_argument('--profile', nargs='?', const=f'{script}.profile.json', default=None,
+                            metavar='PATH', help='write a JSON trace of every stage')
+        parser.add_argument('--chrome-trace', action='store_true',
+                            help='write the trace in Chrome trace event format')
+        output = parser.add_mutually_exclusive_group()
+        output.add_argument('--write', action='store_true', help=f'rewrite {QUESTIONS_KT} (default: dry run)')
+        output.add_argument('--out', metavar='PATH', help='write the updated bank here instead of QUESTIONS_KT')
+        args = parser.parse_args(argv)
+        return cls(script, args.profile, args.chrome_trace, args.write, args.out)
+
+    def stage(self, name):
+        # A stage writes only if asked to and every earlier pattern matched
+        missed = any(s.missed for s in self.stages)
+        if self.write and missed:
+            self.refused = True
+        return _StageContext(self, Stage(name, self.enabled, not self.write or missed, self.out))
+
+    def totals(self):
+        keys = ('wall_s', 'cpu_s', 'bytes_in', 'bytes_out', 'matched', 'missed', 'ambiguous')
+        totals = {key: sum(getattr(s, key) for s in self.stages) for key in keys}
+        totals['peak_mem_bytes'] = max((s.peak_mem_bytes for s in self.stages), default=0)
+        if resource is not None:
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            scale = 1 if sys.platform == 'darwin' else 1024
+            totals['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return totals
+
+    def trace(self):
+        if not self.chrome_trace:
+            return {
+                'script': self.script,
+                'stages': [s.to_dict() for s in self.stages],
+                'totals': self.totals(),
+            }
+        events = []
+        for s in self.stages:
+            args = s.to_dict()
+            del args['name']
+            events.append({
+                'name': s.name,
+                'cat': self.script,
+                'ph': 'X',
+                'ts': s.start_us,
+                'dur': int(s.wall_s * 1e6),
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self):
+        """Write the trace if profiling; always warn on stderr about missed patterns.
+
+        Exits with status 1 if a write was asked for but refused because of missed patterns.
+        """
+        missed = sum(s.missed for s in self.stages)
+        if missed:
+            print(f"WARNING: {missed} pattern(s) matched nothing - see stage summaries above",
+                  file=sys.stderr)
+        if self.refused:
+            print("Nothing written: fix the missed patterns first", file=sys.stderr)
+        elif not self.write:
+            print(f"Dry run: {QUESTIONS_KT} was not written (pass --write, or --out PATH)")
+        elif self.out:
+            print(f"Wrote the updated bank to {self.out}; {QUESTIONS_KT} was not changed")
+        if self.enabled:
+            with open(self.trace_path, 'w', encoding='utf-8') as f:
+                json.dump(self.trace(), f, indent=2)
+            print(f"Wrote profile to {self.trace_path}")
+        if self.refused:
+            sys.exit(1)
@@ -5,9 +5,13 @@ Update APQR, Disposition, Supplier Quality, Management Review
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Annual Product Quality Review (1.15)
 apqr_questions = [
@@ -38,12 +42,13 @@ apqr_questions = [
     ('qu_apqr_25', 'Are APQRs archived (digital/paper secure) with retention ≥ product discontinuation +1yr?'),
 ]
 
-for i, (q_id, q_text) in enumerate(apqr_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_apqr", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_apqr') as stage:
+    for i, (q_id, q_text) in enumerate(apqr_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_apqr", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated APQR questions")
+print(f"Updated APQR questions ({stage.summary()})")
 
 # Product Disposition (1.16)
 disposition_questions = [
@@ -74,15 +79,18 @@ disposition_questions = [
     ('qu_disposition_25', 'Is batch disposition summary (release rates ≥99%, trends) included in management review discussions?'),
 ]
 
-for i, (q_id, q_text) in enumerate(disposition_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_disposition", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_disposition') as stage:
+    for i, (q_id, q_text) in enumerate(disposition_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_disposition", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Disposition questions")
+print(f"Updated Disposition questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating APQR and Disposition")
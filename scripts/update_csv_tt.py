@@ -5,9 +5,13 @@ Update CSV, Tech Transfer, APQR, Disposition, Supplier Quality, Management Revie
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Computer System Validation (1.13)
 csv_questions = [
@@ -38,12 +42,13 @@ csv_questions = [
     ('qu_csv_25', 'Are validation documents archived securely (fireproof/digital WORM, retrievable <30min) for inspection (lifecycle +1yr)?'),
 ]
 
-for i, (q_id, q_text) in enumerate(csv_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_csv", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_csv') as stage:
+    for i, (q_id, q_text) in enumerate(csv_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_csv", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated CSV questions")
+print(f"Updated CSV questions ({stage.summary()})")
 
 # Technology Transfer (1.14)
 tech_transfer_questions = [
@@ -74,15 +79,18 @@ tech_transfer_questions = [
     ('qu_tech_transfer_25', 'Are TT activities (scale factors, minor tweaks) linked to change controls with regulatory assessment?'),
 ]
 
-for i, (q_id, q_text) in enumerate(tech_transfer_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_tech_transfer", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_tech_transfer') as stage:
+    for i, (q_id, q_text) in enumerate(tech_transfer_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_tech_transfer", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Technology Transfer questions")
+print(f"Updated Technology Transfer questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating CSV and Tech Transfer")
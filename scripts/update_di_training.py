@@ -5,9 +5,13 @@ Update Data Integrity, Training Management, Field Alert Reports, Change Control,
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Data Integrity (1.7)
 data_integrity_questions = [
@@ -38,12 +42,13 @@ data_integrity_questions = [
     ('qu_data_integrity_25', 'Are DI controls periodically assessed through targeted internal audits/self-inspections (annual coverage ≥90% systems), with findings trended and CAPA tracked?'),
 ]
 
-for i, (q_id, q_text) in enumerate(data_integrity_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_data_integrity", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_data_integrity') as stage:
+    for i, (q_id, q_text) in enumerate(data_integrity_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_data_integrity", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Data Integrity questions")
+print(f"Updated Data Integrity questions ({stage.summary()})")
 
 # Training Management (1.8)
 training_mgmt_questions = [
@@ -74,15 +79,18 @@ training_mgmt_questions = [
     ('qu_training_25', 'Are training files (matrices, records, gaps) proactively included in regulatory audit preparation packages with mock audit readiness ≥95%?'),
 ]
 
-for i, (q_id, q_text) in enumerate(training_mgmt_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_training", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_training') as stage:
+    for i, (q_id, q_text) in enumerate(training_mgmt_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_training", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Training Management questions")
+print(f"Updated Training Management questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating Data Integrity and Training Management")
@@ -5,9 +5,13 @@ Update Field Alert Reports, Change Control, Quality Risk Management
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Field Alert Reports (1.9)
 far_questions = [
@@ -38,12 +42,13 @@ far_questions = [
     ('qu_field_alerts_25', 'Are drug shortage implications (e.g., quality deviation during shortage) assessed during FAR decisions, with allocation risk documented?'),
 ]
 
-for i, (q_id, q_text) in enumerate(far_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_field_alerts", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_field_alerts') as stage:
+    for i, (q_id, q_text) in enumerate(far_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_field_alerts", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Field Alert Reports questions")
+print(f"Updated Field Alert Reports questions ({stage.summary()})")
 
 # Change Control (1.10)
 change_control_questions = [
@@ -74,12 +79,13 @@ change_control_questions = [
     ('qu_change_control_25', 'Are change control metrics (cycle time, overdue %, CAPA linkage) reviewed quarterly in management review with improvement actions?'),
 ]
 
-for i, (q_id, q_text) in enumerate(change_control_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_change_control", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_change_control') as stage:
+    for i, (q_id, q_text) in enumerate(change_control_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_change_control", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Change Control questions")
+print(f"Updated Change Control questions ({stage.summary()})")
 
 # Quality Risk Management (1.6)
 risk_mgmt_questions = [
@@ -110,29 +116,34 @@ risk_mgmt_questions = [
     ('qu_risk_mgmt_25', 'Are QRM failures (mitigation ineffective, risks materialized) trended quarterly for systemic QRM program improvement (training, tools, oversight)?'),
 ]
 
-for i, (q_id, q_text) in enumerate(far_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_field_alerts", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_field_alerts') as stage:
+    for i, (q_id, q_text) in enumerate(far_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_field_alerts", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Field Alert Reports questions")
+print(f"Updated Field Alert Reports questions ({stage.summary()})")
 
-for i, (q_id, q_text) in enumerate(change_control_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_change_control", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_change_control') as stage:
+    for i, (q_id, q_text) in enumerate(change_control_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_change_control", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Change Control questions")
+print(f"Updated Change Control questions ({stage.summary()})")
 
-for i, (q_id, q_text) in enumerate(risk_mgmt_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_risk_mgmt", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_risk_mgmt') as stage:
+    for i, (q_id, q_text) in enumerate(risk_mgmt_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_risk_mgmt", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Quality Risk Management questions")
+print(f"Updated Quality Risk Management questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating FAR, Change Control, and Quality Risk Management")
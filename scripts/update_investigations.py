@@ -3,11 +3,13 @@
 Bulk update Quality Unit questions in QualityUnitQuestions.kt with PDF content
 """
 
-import re
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
 
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Investigations (1.2) - Replace all 25 questions
 investigations_replacements = [
@@ -37,11 +39,15 @@ investigations_replacements = [
     (r'Question\("qu_investigations_25".*?\),', 'Question("qu_investigations_25", "qu_investigations", "When applicable (OOS, complaints), are witness samples, retains, or duplicates included/analyzed in investigations with documented storage conditions and chain-of-custody?", 25),'),
 ]
 
-for pattern, replacement in investigations_replacements:
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_investigations') as investigations:
+    for pattern, replacement in investigations_replacements:
+        q_id = replacement.split('"')[1]
+        content = investigations.sub(pattern, replacement, content, q_id)
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
-print("Updated Investigations questions successfully")
+print(f"Updated Investigations questions ({investigations.summary()})")
@@ -5,9 +5,13 @@ Update Returned Drugs, Audit Management, CSV, Tech Transfer, APQR, Disposition,
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Returned and Salvaged Drug Products (1.11)
 returned_drugs_questions = [
@@ -38,12 +42,13 @@ returned_drugs_questions = [
     ('qu_returned_drugs_25', 'Are return trends (quarterly by product/customer/reason) reviewed during management review with preventive actions assigned?'),
 ]
 
-for i, (q_id, q_text) in enumerate(returned_drugs_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_returned_drugs", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_returned_drugs') as stage:
+    for i, (q_id, q_text) in enumerate(returned_drugs_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_returned_drugs", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Returned Drugs questions")
+print(f"Updated Returned Drugs questions ({stage.summary()})")
 
 # Audit Management (1.12)
 audit_questions = [
@@ -74,15 +79,18 @@ audit_questions = [
     ('qu_audit_25', 'Are auditees trained annually on audit preparedness (document readiness, response SOPs, mock drills) with ≥90% participation?'),
 ]
 
-for i, (q_id, q_text) in enumerate(audit_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_audit", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_audit') as stage:
+    for i, (q_id, q_text) in enumerate(audit_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_audit", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Audit Management questions")
+print(f"Updated Audit Management questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating Returned Drugs and Audit Management")
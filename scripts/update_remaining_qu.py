@@ -6,9 +6,13 @@ Data Integrity, Training Management, Field Alert Reports, Change Control, Qualit
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Document Management (1.4) - 25 questions (note: original has 26, need to fix)
 document_mgmt_questions = [
@@ -40,12 +44,13 @@ document_mgmt_questions = [
 ]
 
 # Replace Document Management questions
-for i, (q_id, q_text) in enumerate(document_mgmt_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_document_mgmt", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_document_mgmt') as stage:
+    for i, (q_id, q_text) in enumerate(document_mgmt_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_document_mgmt", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Document Management questions")
+print(f"Updated Document Management questions ({stage.summary()})")
 
 # Complaint Management (1.5)
 complaint_mgmt_questions = [
@@ -76,15 +81,18 @@ complaint_mgmt_questions = [
     ('qu_complaint_mgmt_25', 'Are complaint investigations extended to sister plants/manufacturing sites using same material/process, with shared findings and coordinated CAPA?'),
 ]
 
-for i, (q_id, q_text) in enumerate(complaint_mgmt_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_complaint_mgmt", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_complaint_mgmt') as stage:
+    for i, (q_id, q_text) in enumerate(complaint_mgmt_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_complaint_mgmt", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Complaint Management questions")
+print(f"Updated Complaint Management questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating Document Management and Complaint Management")
@@ -5,9 +5,13 @@ Update Supplier Quality Oversight and Management Review
 
 import re
 
+from stage_profiler import QUESTIONS_KT, Profiler
+
+profiler = Profiler.from_argv()
+
 # Read the file
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'r', encoding='utf-8') as f:
-    content = f.read()
+with profiler.stage('read') as stage:
+    content = stage.read_text(QUESTIONS_KT)
 
 # Supplier Quality Oversight (1.18)
 supplier_questions = [
@@ -38,12 +42,13 @@ supplier_questions = [
     ('qu_supplier_25', 'Are supplier Key Performance Indicators (KPIs) — such as on-time delivery ≥98% and quality compliance ≥99% — reviewed quarterly during management reviews, with delisting actions taken when performance falls below thresholds?'),
 ]
 
-for i, (q_id, q_text) in enumerate(supplier_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_supplier", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_supplier') as stage:
+    for i, (q_id, q_text) in enumerate(supplier_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_supplier", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Supplier Quality questions")
+print(f"Updated Supplier Quality questions ({stage.summary()})")
 
 # Management Review & Quality Metrics (1.17)
 mgmt_review_questions = [
@@ -74,15 +79,18 @@ mgmt_review_questions = [
     ('qu_mgmt_review_25', 'Are meeting minutes recorded, including attendees, metrics reviewed, decisions made, and action owners with dates, distributed within seven days, and followed up with ≥90% completion?'),
 ]
 
-for i, (q_id, q_text) in enumerate(mgmt_review_questions, 1):
-    pattern = rf'Question\("{re.escape(q_id)}".*?\),'
-    replacement = f'Question("{q_id}", "qu_mgmt_review", "{q_text}", {i}),'
-    content = re.sub(pattern, replacement, content, count=1)
+with profiler.stage('qu_mgmt_review') as stage:
+    for i, (q_id, q_text) in enumerate(mgmt_review_questions, 1):
+        pattern = rf'Question\("{re.escape(q_id)}".*?\),'
+        replacement = f'Question("{q_id}", "qu_mgmt_review", "{q_text}", {i}),'
+        content = stage.sub(pattern, replacement, content, q_id)
 
-print("Updated Management Review questions")
+print(f"Updated Management Review questions ({stage.summary()})")
 
 # Write back
-with open('app/src/main/java/com/example/validator/data/QualityUnitQuestions.kt', 'w', encoding='utf-8') as f:
-    f.write(content)
+with profiler.stage('write') as stage:
+    stage.write_text(QUESTIONS_KT, content)
+
+profiler.dump()
 
 print("Done updating Supplier Quality and Management Review")